@@ -0,0 +1,30 @@
+import cv2
+
+
+def draw_detections(frame, detections, color=(0, 255, 0)):
+    """
+    Draw boxes and labels for detections into a BGR frame in place
+    Args:
+        frame: BGR frame the detections were computed on
+        detections: Detections returned by ObjectDetector.detect()
+        color: BGR color of boxes and labels
+    Returns:
+        numpy.ndarray: the same frame, for chaining
+    """
+    track_ids = detections.track_ids
+    if track_ids is None:
+        track_ids = [None] * len(detections)
+    else:
+        track_ids = track_ids.tolist()
+
+    for (x1, y1, x2, y2), score, name, track_id in zip(detections.boxes.tolist(),
+                                                       detections.scores.tolist(),
+                                                       detections.names,
+                                                       track_ids):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        text = f"{name}: {score:.2f}"
+        if track_id is not None and track_id >= 0:
+            text = f"#{track_id} {text}"
+        cv2.putText(frame, text, (x1, y1 - 5),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
@@ -1,17 +1,72 @@
+import argparse
 import time
+import json
+from concurrent.futures import ThreadPoolExecutor
 from detector import ObjectDetector
+from metrics import Metrics
+from models import MODELS
+from parallel import ParallelDetector
+from streams import StreamManager
 from ui import ApplicationUI
 import tkinter as tk
 from tkinter import messagebox
 
+# Reference point for the cold-start timings
+APP_START = time.perf_counter()
+
 class ObjectDetectionApp:
-    def __init__(self):
-        """Initialize the application"""
+    def __init__(self, enable_metrics=True, metrics_log_interval=30, detect_interval=1,
+                 motion_threshold=None, model='yolov3', input_size=None, autotune=False,
+                 target_ms=None, latency_budget_ms=None, target_fps=None, sources=None,
+                 workers=None, record_path=None):
+        """
+        Initialize the application
+        Args:
+            enable_metrics: collect per-stage timings and show them in the UI
+            metrics_log_interval: seconds between JSON metrics log lines
+            detect_interval: run the network every Nth frame and track
+                objects in between
+            motion_threshold: reuse the last detections while the scene
+                changes less than this, None to detect on every frame
+            model: registered model name, see models.MODELS
+            input_size: network input size, the model's default if None
+            autotune: benchmark DNN backend, threads and input size while
+                the model loads, reusing the per-host profile after the first run
+            target_ms: per-frame latency budget for autotuning
+            latency_budget_ms, target_fps: adapt input size, frame skip and
+                NMS candidates at run time to hold this budget or frame rate
+            sources: several camera indices, video files or URLs to show
+                in a grid, sharing one model; None for the default webcam
+            workers: run the network in this many worker processes instead
+                of in the application process
+            record_path: append every frame's detections to this detection
+                log directory (see recorder.DetectionLog)
+        """
         self.ui = ApplicationUI()
+        self.metrics = Metrics(enabled=enable_metrics, log_interval=metrics_log_interval)
+        self.startup_timings = {'window_created': self._since_start()}
+        self.camera_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+        self.camera_future = None
+        self.quality_targets = (latency_budget_ms, target_fps)
+        self.sources = list(sources) if sources else None
+        self.streams = None
         
         try:
-            self.detector = ObjectDetector()
-            print("Object detector initialized successfully")
+            # The model loads in the background while the window is shown
+            if workers:
+                self.detector = ParallelDetector(workers=workers, metrics=self.metrics,
+                                                 load_async=True, model=model,
+                                                 input_size=input_size, autotune=autotune,
+                                                 target_ms=target_ms)
+            else:
+                self.detector = ObjectDetector(metrics=self.metrics, load_async=True,
+                                               model=model, input_size=input_size,
+                                               autotune=autotune, target_ms=target_ms)
+            self.detector.enable_tracking(detect_interval=detect_interval)
+            if motion_threshold is not None:
+                self.detector.enable_motion_gate(threshold=motion_threshold)
+            if record_path:
+                self.detector.enable_recording(record_path)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to initialize object detector: {str(e)}")
             self.ui.window.quit()
@@ -23,72 +78,211 @@ class ObjectDetectionApp:
 
         self.ui.conf_slider.configure(command=self._update_confidence)
         
+        if self.metrics.enabled or any(t is not None for t in self.quality_targets):
+            self.update_stats()
+            
+        self.ui.set_busy("Loading Model...")
+        self.check_model_ready()
+        
+    def _since_start(self):
+        """Seconds since the application module was imported"""
+        return round(time.perf_counter() - APP_START, 4)
+        
+    def check_model_ready(self):
+        """Poll the background model load and enable the UI once it is done"""
+        if not self.detector.ready.done():
+            self.ui.window.after(100, self.check_model_ready)
+            return
+            
+        error = self.detector.ready.exception()
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to initialize object detector: {str(error)}")
+            self.ui.window.quit()
+            return
+            
+        self.startup_timings['model_ready'] = self._since_start()
+        # Start from the (possibly autotuned) input size the model ended up with
+        latency_budget_ms, target_fps = self.quality_targets
+        if latency_budget_ms is not None or target_fps is not None:
+            self.detector.enable_quality_control(target_ms=latency_budget_ms,
+                                                 target_fps=target_fps)
+        print("Object detector initialized successfully")
+        self.ui.set_idle()
+        
+    def report_startup(self):
+        """Print the cold-start timings as one JSON line"""
+        timings = dict(self.startup_timings)
+        timings.update(self.detector.startup_timings)
+        print(json.dumps({'startup': timings}))
+        
     def _update_confidence(self, value):
         """Update detector confidence threshold when slider changes"""
+        self.ui._update_conf_label(value)
         if hasattr(self, 'detector'):
             self.detector.set_confidence_threshold(float(value))
+            
+            # Redraw the last frame right away instead of waiting for the
+            # next inference to pick up the new threshold. The grid shows
+            # several streams and the cache holds only the last one detected,
+            # so it waits for the next results instead.
+            if self.ui.running and self.streams is None:
+                frame, detections = self.detector.redraw()
+                if frame is not None:
+                    self.ui.render_frame(frame)
+                    self.ui.update_detections(detections)
         
     def toggle_detection(self):
         """Toggle the detection on/off"""
+        if self.camera_future is not None:
+            return
+            
+        if not self.ui.running and self.sources:
+            # Open every source in the background and poll for them
+            print("Starting streams...")
+            self.ui.set_busy("Starting Streams...")
+            self.streams = StreamManager(self.detector, track=True)
+            for source in self.sources:
+                self.streams.add_stream(source, mirror=str(source).isdigit(), loop=True)
+            self.camera_future = self.camera_executor.submit(self.streams.start)
+            self.check_streams_ready()
+        elif not self.ui.running:  
+            # Start the camera in the background and poll for it
+            print("Starting camera...")
+            self.ui.set_busy("Starting Camera...")
+            self.camera_requested_at = time.perf_counter()
+            self.camera_future = self.camera_executor.submit(self.detector.start_camera)
+            self.check_camera_ready()
+        else:  # If currently running
+            # Stop detection
+            print("Stopping camera...")
+            self.stop_streams()
+            self.detector.stop_camera()
+            self.ui.set_idle()
+            
+    def check_streams_ready(self):
+        """Show the stream grid once every source is open"""
+        future = self.camera_future
+        if not future.done():
+            self.ui.window.after(20, self.check_streams_ready)
+            return
+        self.camera_future = None
+        
+        error = future.exception()
+        if error is not None:
+            print(f"Stream Error: {error}")
+            messagebox.showerror("Stream Error", str(error))
+            self.stop_streams()
+            self.ui.set_idle()
+            return
+            
+        self.stream_seqs = {name: 0 for name in self.streams.streams}
+        self.last_stream_stats = 0.0
+        self.ui.show_streams(list(self.streams.streams))
+        self.ui.set_running()
+        self.update_streams()
+        
+    def update_streams(self):
+        """Show the newest result of every stream while the grid is running"""
+        streams = self.streams
+        if not self.ui.running or streams is None:
+            return
+            
+        changed = False
+        for name in self.stream_seqs:
+            latest = streams.get_latest(name)
+            if latest is None or latest[0] == self.stream_seqs[name]:
+                continue
+            seq, frame, detections = latest
+            self.stream_seqs[name] = seq
+            with self.metrics.stage('ui_frame'):
+                self.ui.render_stream(name, frame)
+            self.metrics.tick('display')
+            changed = True
+            
+        if changed:
+            # One combined list, labelled with the stream each object is in
+            detections = []
+            for name in self.stream_seqs:
+                latest = streams.get_latest(name)
+                if latest is not None:
+                    detections.extend(dict(d, **{'class': f"{name}: {d['class']}"})
+                                      for d in latest[2])
+            with self.metrics.stage('ui_detections'):
+                self.ui.update_detections(detections)
+                
+        now = time.perf_counter()
+        if now - self.last_stream_stats >= 1.0:
+            self.last_stream_stats = now
+            self.ui.update_stream_stats(streams.stats())
+            
+        if streams.running:
+            self.ui.window.after(10, self.update_streams)
+        else:
+            error = streams.error
+            self.stop_streams()
+            self.ui.set_idle()
+            if error is not None:
+                messagebox.showerror("Error", f"Error processing streams: {str(error)}")
+                
+    def stop_streams(self):
+        """Stop the multi-stream manager if it is running"""
+        if self.streams is not None:
+            self.streams.stop()
+            self.streams = None
+            
+    def check_camera_ready(self):
+        """Start the detection pipeline once the camera delivers frames"""
+        future = self.camera_future
+        if not future.done():
+            self.ui.window.after(20, self.check_camera_ready)
+            return
+        self.camera_future = None
+        
         try:
-            if not self.ui.running:  
-                # Start detection
-                print("Starting camera...")
-                self.detector.start_camera()
-                self.ui.running = True  
-                self.ui.control_button.configure(
-                    text="Stop Detection",
-                    fg_color="#c42b1c",
-                    hover_color="#a62215"
-                )
-                self.update_frame()  
-            else:  # If currently running
-                # Stop detection
-                print("Stopping camera...")
-                self.detector.stop_camera()
-                self.ui.running = False 
-                self.ui.control_button.configure(
-                    text="Start Detection",
-                    fg_color=["#3a7ebf", "#1f538d"],
-                    hover_color=["#325882", "#14375e"]
-                )
-                self.ui.video_label.configure(text="Camera Feed Not Started", image="")
+            future.result()
+            self.detector.start_pipeline()
+            self.last_seq = 0
+            self.ui.set_running()
+            self.update_frame()  
                 
         except ValueError as e:
             print(f"Camera Error: {e}")
             messagebox.showerror("Camera Error", str(e))
-            self.ui.running = False
-            self.ui.control_button.configure(
-                text="Start Detection",
-                fg_color=["#3a7ebf", "#1f538d"],
-                hover_color=["#325882", "#14375e"]
-            )
+            self.detector.stop_camera()
+            self.ui.set_idle()
         except Exception as e:
             print(f"Unexpected error: {e}")
             messagebox.showerror("Error", f"Unexpected error: {str(e)}")
-            self.ui.running = False
-            self.ui.control_button.configure(
-                text="Start Detection",
-                fg_color=["#3a7ebf", "#1f538d"],
-                hover_color=["#325882", "#14375e"]
-            )
+            self.detector.stop_camera()
+            self.ui.set_idle()
                 
     def update_frame(self):
-        """Update the frame if detection is running"""
+        """Show the newest pipeline result if detection is running"""
         if self.ui.running:
             try:
- 
-                frame, detections = self.detector.get_frame()
+                pipeline = self.detector.pipeline
+                latest = self.detector.get_latest_result()
                 
-                if frame is not None:
-
-                    self.ui.update_frame(frame)
-                    self.ui.update_detections(detections)
-
+                if latest is not None and latest[0] != self.last_seq:
+                    seq, frame, detections = latest
+                    if self.last_seq == 0 and 'first_detection' not in self.startup_timings:
+                        self.startup_timings['first_detection'] = self._since_start()
+                        self.startup_timings['camera_to_first_detection'] = round(
+                            time.perf_counter() - self.camera_requested_at, 4)
+                        self.report_startup()
+                    self.last_seq = seq
+                    with self.metrics.stage('ui_frame'):
+                        self.ui.render_frame(frame)
+                    with self.metrics.stage('ui_detections'):
+                        self.ui.update_detections(detections)
+                    self.metrics.tick('display')
+                    
+                if pipeline is not None and pipeline.running:
                     self.ui.window.after(10, self.update_frame)
                 else:
     
                     print("Failed to get camera frame")
+                    self.detector.stop_camera()
                     self.ui.running = False
                     self.ui.control_button.configure(
                         text="Start Detection",
@@ -98,6 +292,7 @@ class ObjectDetectionApp:
                     messagebox.showerror("Error", "Failed to get camera frame. Please check your camera connection.")
             except Exception as e:
                 print(f"Error in update_frame: {e}")
+                self.detector.stop_camera()
                 self.ui.running = False
                 self.ui.control_button.configure(
                     text="Start Detection",
@@ -106,10 +301,17 @@ class ObjectDetectionApp:
                 )
                 messagebox.showerror("Error", f"Error updating frame: {str(e)}")
             
+    def update_stats(self):
+        """Refresh the performance stats panel once a second"""
+        self.ui.update_stats(self.metrics.snapshot(), self.detector.operating_point)
+        self.ui.window.after(1000, self.update_stats)
+        
     def on_closing(self):
         """Handle application closing"""
         if hasattr(self, 'detector'):
-            self.detector.stop_camera()
+            self.stop_streams()
+            self.detector.close()
+        self.camera_executor.shutdown(wait=False)
         self.ui.on_closing()
         
     def run(self):
@@ -118,5 +320,35 @@ class ObjectDetectionApp:
         self.ui.run()
 
 if __name__ == "__main__":
-    app = ObjectDetectionApp()
+    parser = argparse.ArgumentParser(description="AI Object Detection")
+    parser.add_argument('sources', nargs='*',
+                        help='camera indices, video files or URLs to show in a grid '
+                             '(default: the webcam)')
+    parser.add_argument('--model', default='yolov3', choices=sorted(MODELS),
+                        help='registered model to use (default: yolov3)')
+    parser.add_argument('--input-size', type=int,
+                        help="network input size, a multiple of 32 (default: the model's)")
+    parser.add_argument('--workers', type=int,
+                        help='run the network in this many worker processes')
+    parser.add_argument('--record', metavar='DIR',
+                        help='append all detections to a detection log in DIR')
+    parser.add_argument('--autotune', action='store_true',
+                        help='pick backend, threads and input size by benchmarking '
+                             '(cached per host)')
+    parser.add_argument('--target-ms', type=float,
+                        help='latency budget per frame for --autotune')
+    parser.add_argument('--latency-budget-ms', type=float,
+                        help='lower input size, frame rate of detection and NMS candidates '
+                             'at run time to keep frames under this latency')
+    parser.add_argument('--target-fps', type=float,
+                        help='alternatively, the frame rate to hold')
+    args = parser.parse_args()
+    if args.autotune and args.workers:
+        parser.error('--autotune is not supported with --workers')
+    app = ObjectDetectionApp(sources=args.sources, model=args.model,
+                             input_size=args.input_size, workers=args.workers,
+                             record_path=args.record, autotune=args.autotune,
+                             target_ms=args.target_ms,
+                             latency_budget_ms=args.latency_budget_ms,
+                             target_fps=args.target_fps)
     app.run()
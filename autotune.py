@@ -0,0 +1,215 @@
+import json
+import os
+import platform
+import socket
+import time
+
+import cv2
+import numpy as np
+
+from downloader import FileLock, default_cache_dir
+from models import INPUT_SIZES
+
+CPU_TARGETS = ('DNN_TARGET_CPU', 'DNN_TARGET_CPU_FP16')
+CPU_BACKENDS = ('DNN_BACKEND_OPENCV', 'DNN_BACKEND_INFERENCE_ENGINE')
+
+
+def host_fingerprint():
+    """Identify the host and library versions a profile was measured on"""
+    return {
+        'host': socket.gethostname(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+    }
+
+
+def profile_path(directory=None):
+    """Per-host profile file inside the model cache"""
+    directory = directory or default_cache_dir()
+    return os.path.join(directory, 'profiles', f"{socket.gethostname()}.json")
+
+
+def load_profile(key, path=None):
+    """
+    Look up a tuned configuration
+    Returns:
+        dict: the stored configuration, or None if there is none or it was
+        measured on different hardware or OpenCV
+    """
+    path = path or profile_path()
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get('fingerprint') != host_fingerprint():
+        return None
+    return profile.get('models', {}).get(key)
+
+
+def save_profile(key, config, path=None):
+    """Store a tuned configuration, keeping the other models' entries"""
+    path = path or profile_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fingerprint = host_fingerprint()
+
+    with FileLock(path + '.lock'):
+        try:
+            with open(path) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            profile = {}
+        if profile.get('fingerprint') != fingerprint:
+            profile = {'fingerprint': fingerprint, 'models': {}}
+        profile['models'][key] = config
+
+        part_path = path + '.part'
+        with open(part_path, 'w') as f:
+            json.dump(profile, f, indent=2)
+        os.replace(part_path, path)
+
+
+def candidate_targets():
+    """
+    CPU backend/target pairs this OpenCV build can run
+    Returns:
+        list: (backend_name, target_name) pairs
+    """
+    pairs = []
+    for backend_name in CPU_BACKENDS:
+        backend = getattr(cv2.dnn, backend_name, None)
+        if backend is None:
+            continue
+        available = set(cv2.dnn.getAvailableTargets(backend))
+        for target_name in CPU_TARGETS:
+            target = getattr(cv2.dnn, target_name, None)
+            if target is not None and target in available:
+                pairs.append((backend_name, target_name))
+    return pairs
+
+
+def thread_counts(max_threads=None):
+    """Thread counts worth trying: powers of two up to the core count, plus the core count"""
+    max_threads = max_threads or os.cpu_count() or 1
+    counts = {max_threads, max(1, max_threads // 2)}
+    n = 1
+    while n < max_threads:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+class Autotuner:
+    def __init__(self, model, target_ms=None, sizes=None, threads=None, targets=None,
+                 runs=3, warmup=1, frame_size=(1280, 720)):
+        """
+        Search backend/target, OpenCV thread count and input size for a
+        loaded network
+        Args:
+            model: cv2.dnn.Net; its backend, target and the global OpenCV
+                thread count are left on the winning configuration
+            target_ms: latency budget per frame; the largest input size whose
+                best configuration meets it wins, otherwise (or without a
+                budget) the fastest configuration overall
+            sizes: input sizes to try, models.INPUT_SIZES by default
+            threads: thread counts to try, thread_counts() by default
+            targets: (backend_name, target_name) pairs, candidate_targets()
+                by default
+            runs: timed forward passes per configuration (median is used)
+            warmup: untimed forward passes after each configuration change
+            frame_size: (width, height) of the synthetic frame
+        """
+        self.model = model
+        self.target_ms = target_ms
+        self.sizes = sorted(sizes or INPUT_SIZES)
+        self.threads = threads or thread_counts()
+        self.targets = targets or candidate_targets()
+        self.runs = runs
+        self.warmup = warmup
+        self.output_layers = list(model.getUnconnectedOutLayersNames())
+        # Noise frame: no detections are needed, only realistic compute
+        rng = np.random.default_rng(0)
+        (W, H) = frame_size
+        self.frame = rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+        self.results = []
+
+    def run(self):
+        """
+        Time every configuration and apply the best one
+        Returns:
+            dict: backend, target, threads, input_size and latency_ms of the
+            chosen configuration plus the target it was tuned for
+        """
+        self.results = []
+        for backend_name, target_name in self.targets:
+            try:
+                self.model.setPreferableBackend(getattr(cv2.dnn, backend_name))
+                self.model.setPreferableTarget(getattr(cv2.dnn, target_name))
+            except cv2.error as e:
+                print(f"Skipping {backend_name}/{target_name}: {e}")
+                continue
+
+            for size in self.sizes:
+                latencies = []
+                for threads in self.threads:
+                    try:
+                        latency = self._measure(size, threads)
+                    except cv2.error as e:
+                        print(f"Skipping {backend_name}/{target_name} at {size}: {e}")
+                        break
+                    latencies.append(latency)
+                    self.results.append({
+                        'backend': backend_name,
+                        'target': target_name,
+                        'threads': threads,
+                        'input_size': size,
+                        'latency_ms': round(latency, 3),
+                    })
+                # Larger inputs only get slower, stop once the budget is blown
+                if (not latencies or
+                        (self.target_ms is not None and min(latencies) > self.target_ms)):
+                    break
+
+        if not self.results:
+            raise RuntimeError("No backend configuration could run the model")
+        best = self._choose()
+        self.apply(self.model, best)
+        return dict(best, target_ms=self.target_ms)
+
+    def _measure(self, size, threads):
+        """Median milliseconds for blob + forward at one configuration"""
+        cv2.setNumThreads(threads)
+        for _ in range(self.warmup):
+            self._forward(size)
+        timings = []
+        for _ in range(self.runs):
+            start = time.perf_counter()
+            self._forward(size)
+            timings.append((time.perf_counter() - start) * 1000)
+        return float(np.median(timings))
+
+    def _forward(self, size):
+        blob = cv2.dnn.blobFromImage(self.frame, 1/255.0, (size, size), swapRB=True, crop=False)
+        self.model.setInput(blob)
+        return self.model.forward(self.output_layers)
+
+    def _choose(self):
+        """Largest input size that meets the budget, fastest configuration within it"""
+        fitting = self.results
+        if self.target_ms is not None:
+            fitting = [r for r in self.results if r['latency_ms'] <= self.target_ms]
+            if fitting:
+                size = max(r['input_size'] for r in fitting)
+                fitting = [r for r in fitting if r['input_size'] == size]
+            else:
+                fitting = self.results
+        return min(fitting, key=lambda r: r['latency_ms'])
+
+    @staticmethod
+    def apply(model, config):
+        """Put a network and OpenCV's thread pool on a tuned configuration"""
+        model.setPreferableBackend(getattr(cv2.dnn, config['backend']))
+        model.setPreferableTarget(getattr(cv2.dnn, config['target']))
+        cv2.setNumThreads(config['threads'])
@@ -0,0 +1,214 @@
+"""
+Headless batch detection for video files and image folders
+
+Usage:
+    python -m batch footage.mp4 -o detections.jsonl
+    python -m batch frames/ -o detections.csv --batch-size 16
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+import cv2
+
+from detector import ObjectDetector
+from metrics import Metrics
+from models import MODELS
+from parallel import ParallelDetector
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+
+def iter_frames(path):
+    """
+    Stream frames from a video file or a folder of images
+    Yields:
+        tuple: (frame_index, source_name, frame)
+    """
+    if os.path.isdir(path):
+        names = sorted(
+            name for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        index = 0
+        for name in names:
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is None:
+                print(f"Skipping unreadable image {name}", file=sys.stderr)
+                continue
+            yield index, name, frame
+            index += 1
+        return
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {path}")
+    try:
+        name = os.path.basename(path)
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+            yield index, name, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def iter_batches(frames, batch_size):
+    """Group an iterable of frames into lists of at most batch_size items"""
+    batch = []
+    for item in frames:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DetectionWriter:
+    def __init__(self, stream, fmt):
+        """
+        Write per-frame detections as JSONL (one line per frame) or CSV
+        (one row per detection)
+        """
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unknown output format: {fmt}")
+        self.fmt = fmt
+        self.stream = stream
+        if fmt == 'csv':
+            self.csv = csv.writer(stream)
+            self.csv.writerow(['frame', 'source', 'class', 'confidence',
+                               'x1', 'y1', 'x2', 'y2'])
+
+    def write(self, index, name, detections):
+        """Write the detections of one frame"""
+        if self.fmt == 'jsonl':
+            record = {'frame': index, 'source': name, 'detections': detections.to_dicts()}
+            self.stream.write(json.dumps(record) + '\n')
+        else:
+            for (x1, y1, x2, y2), score, class_name in zip(detections.boxes.tolist(),
+                                                            detections.scores.tolist(),
+                                                            detections.names):
+                self.csv.writerow([index, name, class_name, f"{score:.6f}",
+                                   x1, y1, x2, y2])
+
+
+def run_batch(detector, path, writer, batch_size=8):
+    """
+    Detect objects in every frame under path and write them out
+    Returns:
+        dict: frame count, detection count and throughput
+    """
+    frames = 0
+    detections = 0
+    start = time.perf_counter()
+
+    for batch in iter_batches(iter_frames(path), batch_size):
+        results = detector.detect_batch([frame for _, _, frame in batch])
+        for (index, name, _), frame_results in zip(batch, results):
+            writer.write(index, name, frame_results)
+            detections += len(frame_results)
+        frames += len(batch)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'frames': frames,
+        'detections': detections,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m batch',
+        description='Run object detection over a video file or image folder'
+    )
+    parser.add_argument('input', help='video file or folder of images')
+    parser.add_argument('-o', '--output', default='-',
+                        help='output file, "-" for stdout (default)')
+    parser.add_argument('--format', choices=('jsonl', 'csv'),
+                        help='output format, inferred from the output extension by default')
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help='frames per forward pass (default: 8)')
+    parser.add_argument('--conf', type=float, default=0.5,
+                        help='confidence threshold (default: 0.5)')
+    parser.add_argument('--model', default='yolov3', choices=sorted(MODELS),
+                        help='registered model to use (default: yolov3)')
+    parser.add_argument('--input-size', type=int,
+                        help="network input size, a multiple of 32 (default: the model's)")
+    parser.add_argument('--autotune', action='store_true',
+                        help='pick backend, threads and input size by benchmarking '
+                             '(cached per host)')
+    parser.add_argument('--target-ms', type=float,
+                        help='latency budget per frame for --autotune')
+    parser.add_argument('--config', help='Darknet cfg file to use instead of --model')
+    parser.add_argument('--weights', help='Darknet weights file to use instead of --model')
+    parser.add_argument('--workers', type=int,
+                        help='run the network in this many worker processes')
+    parser.add_argument('--tile', type=int, metavar='PIXELS',
+                        help='detect on overlapping tiles of this size in frames larger than one')
+    parser.add_argument('--tile-grid', metavar='COLSxROWS',
+                        help='split every frame into this grid of tiles instead of --tile')
+    parser.add_argument('--tile-overlap', type=float, default=0.2,
+                        help='fraction of a tile shared with its neighbours (default: 0.2)')
+    parser.add_argument('--metrics', type=float, metavar='SECONDS',
+                        help='log per-stage timings to stderr every SECONDS')
+    args = parser.parse_args(argv)
+    if bool(args.config) != bool(args.weights):
+        parser.error('--config and --weights must be given together')
+
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+    fmt = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+    grid = None
+    if args.tile_grid:
+        try:
+            grid = tuple(int(n) for n in args.tile_grid.lower().split('x'))
+        except ValueError:
+            grid = ()
+        if len(grid) != 2 or min(grid) < 1:
+            parser.error('--tile-grid must look like 3x2')
+
+    # Keep model loading messages out of detections written to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        metrics = Metrics(enabled=args.metrics is not None, log_interval=args.metrics,
+                          log_file=sys.stderr)
+        model_args = dict(config_path=args.config, weights_path=args.weights,
+                          metrics=metrics, model=args.model, input_size=args.input_size)
+        if args.workers:
+            if args.autotune:
+                parser.error('--autotune is not supported with --workers')
+            detector = ParallelDetector(workers=args.workers, **model_args)
+        else:
+            detector = ObjectDetector(autotune=args.autotune, target_ms=args.target_ms,
+                                      **model_args)
+    detector.set_confidence_threshold(args.conf)
+    if args.tile or grid:
+        detector.enable_tiling(tile_size=args.tile, grid=grid, overlap=args.tile_overlap)
+
+    try:
+        if args.output == '-':
+            stats = run_batch(detector, args.input, DetectionWriter(sys.stdout, fmt),
+                              args.batch_size)
+        else:
+            with open(args.output, 'w', newline='') as f:
+                stats = run_batch(detector, args.input, DetectionWriter(f, fmt),
+                                  args.batch_size)
+    finally:
+        detector.close()
+
+    print(f"Processed {stats['frames']} frames, {stats['detections']} detections "
+          f"in {stats['seconds']:.2f}s ({stats['fps']:.1f} FPS)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
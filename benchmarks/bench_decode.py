@@ -0,0 +1,49 @@
+"""
+Microbenchmark for YOLO output decoding
+
+Compares the vectorized decode_outputs against the original per-row loop on
+synthetic YOLOv3-shaped output tensors and reports the time per call of
+each. tests/test_decode.py checks that both produce identical candidates.
+
+Run from the repository root:
+    python benchmarks/bench_decode.py
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from decode_reference import loop_decode, synthetic_outputs
+from detector import decode_outputs
+
+
+def time_call(func, args, repeat):
+    """Return the best per-call time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    W, H = 1280, 720
+    outputs = synthetic_outputs()
+    kept = len(decode_outputs(outputs, W, H, 0.5)[0])
+    rows = sum(len(o) for o in outputs)
+
+    loop_ms = time_call(loop_decode, (outputs, W, H, 0.5), repeat=5)
+    vector_ms = time_call(decode_outputs, (outputs, W, H, 0.5), repeat=50)
+
+    print(f"candidates: {rows} rows, {kept} above threshold")
+    print(f"loop decode:       {loop_ms:8.3f} ms")
+    print(f"vectorized decode: {vector_ms:8.3f} ms")
+    print(f"speedup:           {loop_ms / vector_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
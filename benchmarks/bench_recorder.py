@@ -0,0 +1,102 @@
+"""
+Detection log benchmark
+
+Records synthetic frames through a DetectionRecorder, then times an
+indexed time/class query against a full scan of the memory-mapped records
+and reports both as JSON.
+
+Run from the repository root:
+    python benchmarks/bench_recorder.py --rows 2000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from detector import Detections
+from models import COCO_CLASSES
+from recorder import DetectionLog, DetectionRecorder
+
+
+def synthetic_frames(frames, per_frame, seed=0):
+    """Detections for a run of frames one second apart, few of them people"""
+    rng = np.random.default_rng(seed)
+    classes = list(COCO_CLASSES)
+    for i in range(frames):
+        class_ids = rng.integers(1, len(classes), per_frame).astype(np.int32)
+        if i % 100 == 0:
+            class_ids[0] = 0
+        corners = rng.integers(0, 1000, (per_frame, 2)).astype(np.int32)
+        boxes = np.hstack([corners, corners + 50])
+        scores = rng.random(per_frame).astype(np.float32)
+        yield Detections(boxes, scores, class_ids, classes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--per-frame', type=int, default=10, help='detections per frame')
+    parser.add_argument('--window', type=float, default=3600.0,
+                        help='length of the queried time range in seconds (default: 3600)')
+    parser.add_argument('-o', '--output', help='write results JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    frames = args.rows // args.per_frame
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'detections.log')
+        frame_list = list(synthetic_frames(frames, args.per_frame))
+
+        recorder = DetectionRecorder(path, COCO_CLASSES, max_queue=frames)
+        start = time.perf_counter()
+        for i, detections in enumerate(frame_list):
+            recorder.record(detections, stream=f"cam{i % 4}", timestamp=float(i))
+        record_seconds = time.perf_counter() - start
+        recorder.close()
+        total_seconds = time.perf_counter() - start
+
+        log = DetectionLog(path)
+        t1 = frames / 2
+        t2 = t1 + args.window
+
+        start = time.perf_counter()
+        indexed = log.query(t1, t2, classes=['person'])
+        query_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        records = log.records
+        scan = records[(records['timestamp'] >= t1) & (records['timestamp'] < t2) &
+                       (records['class_id'] == 0)]
+        scan_ms = (time.perf_counter() - start) * 1000
+        if not np.array_equal(indexed, scan):
+            raise SystemExit("Indexed query and full scan disagree")
+
+        results = {
+            'timestamp': time.time(),
+            'rows': len(log),
+            'bytes': os.path.getsize(os.path.join(path, 'records.bin')),
+            'record_us_per_frame': round(record_seconds / frames * 1e6, 2),
+            'write_rows_per_second': round(len(log) / total_seconds),
+            'matches': len(indexed),
+            'query_ms': round(query_ms, 3),
+            'full_scan_ms': round(scan_ms, 3),
+        }
+        del log, records
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Multi-stream benchmark with video files standing in for cameras
+
+Writes one synthetic video per stream, plays them at their frame rate
+through a StreamManager sharing a single tiny random-weight model, and
+reports per-stream FPS, drop counts and capture-to-result latency as JSON.
+One stream can be made much faster than the others to check that the
+round-robin scheduler keeps serving the slow ones.
+
+Run from the repository root:
+    python benchmarks/bench_streams.py --streams 4 --seconds 5
+    python benchmarks/bench_streams.py --streams 3 --fast-fps 120
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from detector import ObjectDetector
+from pipeline import SyntheticFrameSource
+from streams import StreamManager
+from tiny_model import write_tiny_model
+
+
+def write_video(path, frames, fps, width, height, seed):
+    """Write a short synthetic MJPG video"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        raise SystemExit("OpenCV cannot write MJPG video here")
+    source = SyntheticFrameSource(width, height, seed=seed)
+    for _ in range(frames):
+        writer.write(source.read()[1])
+    writer.release()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--streams', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--fps', type=float, default=15.0, help='frame rate of each video')
+    parser.add_argument('--fast-fps', type=float,
+                        help='read the first stream at this rate instead')
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('-o', '--output', help='write results JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config_path, weights_path = write_tiny_model(workdir)
+        with contextlib.redirect_stdout(sys.stderr):
+            detector = ObjectDetector(config_path=config_path, weights_path=weights_path)
+
+        manager = StreamManager(detector, batch_size=args.batch_size, track=True)
+        for i in range(args.streams):
+            path = write_video(os.path.join(workdir, f'stream{i}.avi'), int(args.fps * 2),
+                               args.fps, args.width, args.height, seed=i)
+            fps = args.fast_fps if i == 0 and args.fast_fps else None
+            manager.add_stream(path, fps=fps, loop=True)
+
+        manager.start()
+        time.sleep(args.seconds)
+        stats = manager.stats()
+        batches = manager.batches_run
+        manager.stop()
+
+    results = {
+        'timestamp': time.time(),
+        'streams': args.streams,
+        'seconds': args.seconds,
+        'batch_size': args.batch_size,
+        'batches': batches,
+        'total_fps': round(sum(s['processed'] for s in stats.values()) / args.seconds, 2),
+        'per_stream': stats,
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0 if all(s['error'] is None for s in stats.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Load generator for the HTTP inference server
+
+Sends encoded images from concurrent clients and reports request
+throughput, latency percentiles and the server's batch sizes as JSON.
+Without --url it starts in-process servers on a tiny random-weight model,
+once with one request per forward pass (--max-batch-size 1) as the baseline
+and once with dynamic batching, and compares the two.
+
+Run from the repository root:
+    python benchmarks/load_test.py --clients 16 --requests 400
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --clients 8
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from detector import ObjectDetector
+from pipeline import SyntheticFrameSource
+from server import DetectionServer, DynamicBatcher
+from tiny_model import write_tiny_model
+
+
+def make_images(count, width, height):
+    """JPEG-encoded synthetic frames"""
+    source = SyntheticFrameSource(width, height)
+    images = []
+    for _ in range(count):
+        # Smooth the noise so the JPEGs have a realistic size
+        frame = cv2.GaussianBlur(source.read()[1], (15, 15), 0)
+        images.append(cv2.imencode('.jpg', frame)[1].tobytes())
+    return images
+
+
+def run_load(url, images, clients, requests):
+    """
+    Send requests from several client threads over keep-alive connections
+    Returns:
+        dict: throughput, latency percentiles and error count
+    """
+    parts = urllib.parse.urlsplit(url)
+    latencies = []
+    errors = []
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    break
+                body = images[i % len(images)]
+                start = time.perf_counter()
+                connection.request('POST', '/detect', body=body,
+                                   headers={'Content-Type': 'image/jpeg'})
+                response = connection.getresponse()
+                response.read()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if response.status == 200:
+                        latencies.append(elapsed)
+                    else:
+                        errors.append(response.status)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        'clients': clients,
+        'requests': requests,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+        'p95_ms': round(float(np.percentile(ms, 95)), 2) if len(ms) else None,
+    }
+
+
+def server_metrics(url):
+    """Fetch GET /metrics from the server"""
+    parts = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+    try:
+        connection.request('GET', '/metrics')
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+@contextlib.contextmanager
+def local_server(detector, max_batch_size, max_wait_ms):
+    """Run a DetectionServer on a free port for the duration of a with block"""
+    batcher = DynamicBatcher(detector, max_batch_size, max_wait_ms)
+    batcher.start()
+    server = DetectionServer(('127.0.0.1', 0), batcher)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.stop()
+
+
+def measure(url, images, args):
+    result = run_load(url, images, args.clients, args.requests)
+    stats = server_metrics(url)
+    result['batch_size'] = stats['batch_size']
+    result['server_stages'] = {name: stats['stages'][name]['p50_ms']
+                               for name in ('queue_wait', 'batch') if name in stats['stages']}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', help='server to load instead of starting local ones')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent clients (default: 16)')
+    parser.add_argument('--requests', type=int, default=400, help='total requests (default: 400)')
+    parser.add_argument('--max-batch-size', type=int, default=8)
+    parser.add_argument('--max-wait-ms', type=float, default=10.0)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('-o', '--output', help='write results JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    images = make_images(16, args.width, args.height)
+    results = {'timestamp': time.time(), 'image_size': [args.width, args.height]}
+
+    if args.url:
+        results['server'] = measure(args.url, images, args)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            config_path, weights_path = write_tiny_model(workdir)
+            with contextlib.redirect_stdout(sys.stderr):
+                detector = ObjectDetector(config_path=config_path, weights_path=weights_path)
+            # Warm up the network at both batch shapes
+            detector.detect_batch([np.zeros((args.height, args.width, 3), np.uint8)] *
+                                  args.max_batch_size)
+
+            with local_server(detector, 1, 0) as url:
+                results['baseline'] = measure(url, images, args)
+            with local_server(detector, args.max_batch_size, args.max_wait_ms) as url:
+                results['batched'] = measure(url, images, args)
+        results['speedup'] = round(results['batched']['requests_per_second'] /
+                                   results['baseline']['requests_per_second'], 2)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
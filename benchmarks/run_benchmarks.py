@@ -0,0 +1,241 @@
+"""
+Offline benchmark suite for the detection hot path
+
+Feeds synthetic frames through ObjectDetector and reports throughput and
+per-stage latency for detection (blob, forward, decode, nms), annotation,
+CTkImage conversion and the Tk UI update as JSON. Runs on a CPU-only box
+without network access: by default it generates a tiny random-weight
+Darknet model, or it can use model files already present locally.
+
+Run from the repository root:
+    python benchmarks/run_benchmarks.py -o results.json
+    python benchmarks/run_benchmarks.py --baseline results.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from annotate import draw_detections
+from detector import ObjectDetector
+from downloader import default_cache_dir
+from metrics import Metrics
+from pipeline import SyntheticFrameSource
+from tiny_model import write_tiny_model
+
+
+def environment():
+    """Describe the host the numbers were taken on"""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+
+def resolve_model(args, workdir):
+    """Pick the model files to benchmark"""
+    if args.config and args.weights:
+        return 'custom', args.config, args.weights
+    if args.model == 'local':
+        config_path = os.path.join(default_cache_dir(), 'yolov3.cfg')
+        weights_path = os.path.join(default_cache_dir(), 'yolov3.weights')
+        if not (os.path.exists(config_path) and os.path.exists(weights_path)):
+            raise SystemExit(f"No YOLOv3 files in {default_cache_dir()}, use --model tiny")
+        return 'yolov3', config_path, weights_path
+    config_path, weights_path = write_tiny_model(workdir, seed=args.seed)
+    return 'tiny', config_path, weights_path
+
+
+def bench_detection(detector, frames, warmup):
+    """Per-frame detect + draw, timed by the detector's own stages"""
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+    detector.metrics.reset()
+
+    detections = []
+    start = time.perf_counter()
+    for frame in frames:
+        result = detector.detect(frame)
+        canvas = frame.copy()
+        with detector.metrics.stage('annotate'):
+            draw_detections(canvas, result)
+        detections.append(result)
+    elapsed = time.perf_counter() - start
+
+    return detections, {
+        'frames': len(frames),
+        'seconds': round(elapsed, 4),
+        'fps': round(len(frames) / elapsed, 2),
+        'mean_detections': round(float(np.mean([len(d) for d in detections])), 2),
+    }
+
+
+def bench_batch(detector, frames, batch_size):
+    """Throughput of detect_batch over the same frames"""
+    detector.detect_batch(frames[:batch_size])
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        detector.detect_batch(frames[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    return {
+        'batch_size': batch_size,
+        'seconds': round(elapsed, 4),
+        'fps': round(len(frames) / elapsed, 2),
+    }
+
+
+def bench_conversion(frames, metrics):
+    """CTkImage conversion; needs customtkinter and PIL but no display"""
+    try:
+        from ui import to_ctk_image
+    except ImportError as e:
+        return {'skipped': f"customtkinter unavailable: {e}"}
+
+    for frame in frames:
+        with metrics.stage('convert'):
+            to_ctk_image(frame)
+    return {}
+
+
+def bench_ui(frames, detections, metrics):
+    """Tk UI update; needs a display"""
+    try:
+        import tkinter
+        from ui import ApplicationUI
+    except ImportError as e:
+        return {'skipped': f"customtkinter unavailable: {e}"}
+
+    try:
+        ui = ApplicationUI()
+    except tkinter.TclError as e:
+        return {'skipped': f"no display: {e}"}
+
+    # Time every list update instead of the rate-limited ones
+    ui.detections_interval = 0
+
+    try:
+        for frame, result in zip(frames, detections):
+            dicts = result.to_dicts()
+            with metrics.stage('ui_frame'):
+                ui.render_frame(frame)
+                ui.window.update_idletasks()
+            with metrics.stage('ui_detections'):
+                ui.update_detections(dicts)
+                ui.window.update_idletasks()
+    finally:
+        ui.window.destroy()
+    return {}
+
+
+def compare(results, baseline, tolerance):
+    """
+    List stages whose p50 regressed by more than tolerance against baseline
+    Returns:
+        list: human-readable regression descriptions
+    """
+    regressions = []
+    old_stages = baseline.get('stages', {})
+    for name, stats in results['stages'].items():
+        old = old_stages.get(name)
+        if old is None or old['p50_ms'] <= 0:
+            continue
+        ratio = stats['p50_ms'] / old['p50_ms']
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: p50 {old['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=('tiny', 'local'), default='tiny',
+                        help='random-weight tiny model (default) or the cached YOLOv3 files')
+    parser.add_argument('--config', help='Darknet cfg to benchmark')
+    parser.add_argument('--weights', help='Darknet weights to benchmark')
+    parser.add_argument('--input-size', type=int, help="network input size (default: the model's)")
+    parser.add_argument('--frames', type=int, default=100, help='frames to time (default: 100)')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed warmup frames (default: 5)')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--conf', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-ui', action='store_true', help='skip the Tk UI update stage')
+    parser.add_argument('-o', '--output', help='write results JSON here instead of stdout')
+    parser.add_argument('--baseline', help='results JSON to compare stage p50s against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed p50 slowdown vs baseline (default: 0.25)')
+    args = parser.parse_args(argv)
+    if bool(args.config) != bool(args.weights):
+        parser.error('--config and --weights must be given together')
+
+    source = SyntheticFrameSource(args.width, args.height, seed=args.seed)
+    frames = [source.read()[1] for _ in range(args.frames)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        model_name, config_path, weights_path = resolve_model(args, workdir)
+        metrics = Metrics(window=max(args.frames, 1))
+        with contextlib.redirect_stdout(sys.stderr):
+            detector = ObjectDetector(config_path=config_path, weights_path=weights_path,
+                                      metrics=metrics, input_size=args.input_size)
+        detector.set_confidence_threshold(args.conf)
+
+        detections, end_to_end = bench_detection(detector, frames, args.warmup)
+        stages = metrics.snapshot()['stages']
+
+        batch = bench_batch(detector, frames, args.batch_size)
+
+        metrics.reset()
+        conversion = bench_conversion(frames, metrics)
+        ui = {'skipped': 'disabled with --no-ui'} if args.no_ui else \
+            bench_ui(frames, detections, metrics)
+        stages.update(metrics.snapshot()['stages'])
+
+    results = {
+        'timestamp': time.time(),
+        'environment': environment(),
+        'model': model_name,
+        'input_size': detector.input_size,
+        'frame_size': [args.width, args.height],
+        'end_to_end': end_to_end,
+        'batch': batch,
+        'stages': stages,
+        'skipped': {name: info['skipped'] for name, info in
+                    (('convert', conversion), ('ui', ui)) if 'skipped' in info},
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
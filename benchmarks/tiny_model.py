@@ -0,0 +1,127 @@
+"""
+Tiny random-weight Darknet model for offline benchmarks
+
+Generates a YOLOv3-style cfg with two detection heads (26x26 and 13x13 at a
+416 input) and matching random weights, so ObjectDetector can be exercised
+without downloading yolov3.weights. The detections are meaningless, but the
+output tensors have the real layout and the post-processing stages get a
+realistic amount of work.
+"""
+import os
+
+import numpy as np
+
+NUM_CLASSES = 80
+
+CFG_TEMPLATE = """[net]
+batch=1
+width={size}
+height={size}
+channels=3
+
+[convolutional]
+batch_normalize=1
+filters=16
+size=3
+stride=2
+pad=1
+activation=leaky
+
+[maxpool]
+size=2
+stride=2
+
+[maxpool]
+size=2
+stride=2
+
+[maxpool]
+size=2
+stride=2
+
+[convolutional]
+filters={head_filters}
+size=1
+stride=1
+pad=1
+activation=linear
+
+[yolo]
+mask=3,4,5
+anchors=10,14, 23,27, 37,58, 81,82, 135,169, 344,319
+classes={classes}
+num=6
+jitter=.3
+ignore_thresh=.7
+truth_thresh=1
+random=1
+
+[route]
+layers=-3
+
+[maxpool]
+size=2
+stride=2
+
+[convolutional]
+filters={head_filters}
+size=1
+stride=1
+pad=1
+activation=linear
+
+[yolo]
+mask=0,1,2
+anchors=10,14, 23,27, 37,58, 81,82, 135,169, 344,319
+classes={classes}
+num=6
+jitter=.3
+ignore_thresh=.7
+truth_thresh=1
+random=1
+"""
+
+
+def write_tiny_model(directory, size=416, classes=NUM_CLASSES, seed=0):
+    """
+    Write tiny.cfg and tiny.weights into directory
+    Args:
+        size: network input size written to the cfg
+        classes: number of classes per detection head
+        seed: random seed for the weights
+    Returns:
+        tuple: (config_path, weights_path)
+    """
+    os.makedirs(directory, exist_ok=True)
+    config_path = os.path.join(directory, 'tiny.cfg')
+    weights_path = os.path.join(directory, 'tiny.weights')
+
+    head_filters = 3 * (5 + classes)
+    with open(config_path, 'w') as f:
+        f.write(CFG_TEMPLATE.format(size=size, classes=classes, head_filters=head_filters))
+
+    rng = np.random.default_rng(seed)
+    with open(weights_path, 'wb') as f:
+        # Header: major, minor, revision, images seen
+        np.array([0, 2, 0], dtype=np.int32).tofile(f)
+        np.array([0], dtype=np.int64).tofile(f)
+
+        # Backbone conv: biases, BN scales, means, variances, then kernels
+        filters = 16
+        np.concatenate([
+            rng.normal(0, 0.1, filters),
+            np.ones(filters),
+            np.zeros(filters),
+            np.ones(filters),
+            rng.normal(0, 0.5, filters * 3 * 3 * 3),
+        ]).astype(np.float32).tofile(f)
+
+        # Two 1x1 detection heads: biases then kernels. Negative biases keep
+        # most candidates below typical thresholds, like a real model
+        for _ in range(2):
+            np.concatenate([
+                np.full(head_filters, -3.0),
+                rng.normal(0, 1.5, head_filters * filters),
+            ]).astype(np.float32).tofile(f)
+
+    return config_path, weights_path
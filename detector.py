@@ -2,66 +2,254 @@ import cv2
 import numpy as np
 import time
 import os
-import urllib.request
-import ssl
-from PIL import Image
-import customtkinter as ctk
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from downloader import default_cache_dir, download_file, file_sha256
+from metrics import Metrics
+from models import OUTPUT_ADAPTERS, ModelSpec, check_input_size, get_model
+
+
+def decode_outputs(outputs, W, H, conf_threshold):
+    """
+    Decode raw YOLO output tensors into candidate boxes
+    Args:
+        outputs: sequence of (N, 5 + num_classes) arrays from the network
+        W, H: frame width and height the boxes are scaled to
+        conf_threshold: minimum class score for a candidate to be kept
+    Returns:
+        tuple: (boxes, confidences, class_ids) where boxes is an (N, 4)
+        int32 array of [x, y, w, h], confidences an (N,) float32 array and
+        class_ids an (N,) int32 array
+    """
+    detections = np.concatenate(outputs, axis=0) if len(outputs) > 1 else outputs[0]
+
+    # Class selection and confidence masking on the whole candidate set
+    scores = detections[:, 5:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores.max(axis=1)
+    mask = confidences > conf_threshold
+
+    # Scale the surviving boxes and convert centers to top-left corners
+    box = (detections[mask, 0:4] * np.array([W, H, W, H])).astype("int")
+    centers = box[:, 0:2]
+    sizes = box[:, 2:4]
+    corners = (centers - sizes / 2).astype("int")
+
+    boxes = np.empty((len(box), 4), dtype=np.int32)
+    boxes[:, 0:2] = corners
+    boxes[:, 2:4] = sizes
+
+    return boxes, confidences[mask].astype(np.float32), class_ids[mask].astype(np.int32)
+
+
+class Detections:
+    """Array-backed detection results for one frame"""
+    __slots__ = ('boxes', 'scores', 'class_ids', 'classes', 'track_ids')
+    
+    def __init__(self, boxes, scores, class_ids, classes, track_ids=None):
+        """
+        Args:
+            boxes: (N, 4) int32 array of [x1, y1, x2, y2] in frame pixels
+            scores: (N,) float32 array of confidences
+            class_ids: (N,) int32 array of indices into classes
+            classes: list of class names
+            track_ids: (N,) int32 array of tracker ids, None when untracked;
+                -1 marks a detection without a track
+        """
+        self.boxes = boxes
+        self.scores = scores
+        self.class_ids = class_ids
+        self.classes = classes
+        self.track_ids = track_ids
+        
+    @classmethod
+    def empty(cls, classes):
+        """Create a result with no detections"""
+        return cls(np.empty((0, 4), dtype=np.int32),
+                   np.empty(0, dtype=np.float32),
+                   np.empty(0, dtype=np.int32),
+                   classes)
+        
+    def __len__(self):
+        return len(self.scores)
+        
+    def __repr__(self):
+        return f"Detections({len(self)} objects)"
+        
+    @property
+    def names(self):
+        """Class name of each detection"""
+        return [self.classes[i] for i in self.class_ids]
+        
+    def to_dicts(self):
+        """
+        Convert to the list-of-dicts form shown in the UI
+        Returns:
+            list: dicts with 'class', 'confidence' and 'box' (x1, y1, x2, y2),
+            plus 'track_id' for tracked detections
+        """
+        results = [
+            {
+                'class': self.classes[class_id],
+                'confidence': score,
+                'box': tuple(box)
+            }
+            for box, score, class_id in zip(self.boxes.tolist(),
+                                            self.scores.tolist(),
+                                            self.class_ids.tolist())
+        ]
+        if self.track_ids is not None:
+            for result, track_id in zip(results, self.track_ids.tolist()):
+                if track_id >= 0:
+                    result['track_id'] = track_id
+        return results
+
 
 class ObjectDetector:
-    def __init__(self):
-        """Initialize the ObjectDetector"""
+    def __init__(self, config_path=None, weights_path=None, metrics=None, load_async=False,
+                 model_dir=None, model='yolov3', input_size=None, autotune=False,
+                 target_ms=None):
+        """
+        Initialize the ObjectDetector
+        Args:
+            config_path, weights_path: local Darknet model files to use instead
+                of a registered model
+            model: name of a model in models.MODELS, or a models.ModelSpec
+            input_size: network input size (multiple of 32), the model's
+                default if None; smaller is faster, larger finds smaller objects
+            model_dir: cache directory for downloaded models, shared between
+                processes; see downloader.default_cache_dir()
+            metrics: Metrics collecting per-stage timings, a disabled one
+                by default
+            load_async: download and load the model on a background thread;
+                use the ready future to find out when it is done
+            autotune: pick the DNN backend, thread count and (unless
+                input_size is given) input size by benchmarking after
+                loading; the result is kept in a per-host profile so only
+                the first start pays for it, see autotune_model()
+            target_ms: per-frame latency budget for autotuning
+        """
         self.model = None
-        # COCO dataset class names
-        self.classes = ["person", "bicycle", "car", "motorcycle", "airplane", "bus",
-                       "train", "truck", "boat", "traffic light", "fire hydrant",
-                       "stop sign", "parking meter", "bench", "bird", "cat", "dog",
-                       "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe",
-                       "backpack", "umbrella", "handbag", "tie", "suitcase", "frisbee",
-                       "skis", "snowboard", "sports ball", "kite", "baseball bat",
-                       "baseball glove", "skateboard", "surfboard", "tennis racket",
-                       "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl",
-                       "banana", "apple", "sandwich", "orange", "broccoli", "carrot",
-                       "hot dog", "pizza", "donut", "cake", "chair", "couch",
-                       "potted plant", "bed", "dining table", "toilet", "tv", "laptop",
-                       "mouse", "remote", "keyboard", "cell phone", "microwave", "oven",
-                       "toaster", "sink", "refrigerator", "book", "clock", "vase",
-                       "scissors", "teddy bear", "hair drier", "toothbrush"]
+        self.output_layers = None
+        # Seconds spent in each startup step
+        self.startup_timings = {}
+        self.metrics = metrics if metrics is not None else Metrics(enabled=False)
+        
+        if (config_path is None) != (weights_path is None):
+            raise ValueError("config_path and weights_path must be given together")
+        if config_path is not None:
+            # Absolute paths survive the model_dir join below, so local
+            # files are used where they are instead of in the model cache
+            self.spec = ModelSpec('custom', os.path.abspath(weights_path),
+                                  config=os.path.abspath(config_path))
+        else:
+            self.spec = model if isinstance(model, ModelSpec) else get_model(model)
+        self.input_size = check_input_size(input_size or self.spec.input_size)
+        self.fixed_input_size = input_size is not None
+        self.adapter = OUTPUT_ADAPTERS[self.spec.adapter]
+        self.classes = self.spec.load_classes()
         
         self.cap = None
+        self.pipeline = None
         self.conf_threshold = 0.5
+        self.nms_threshold = 0.3
+        
+        # Per-class overrides: NaN means "use conf_threshold"
+        self.class_thresholds = np.full(len(self.classes), np.nan)
+        self.class_mask = np.ones(len(self.classes), dtype=bool)
+        # Keep at most this many of the best candidates for NMS, None for all
+        self.max_candidates = None
+        
+        # Candidates down to this score are kept from the last detected frame
+        # so a threshold change can be re-applied without another forward
+        # pass: (frame, candidates, tracked detections or None), replaced as
+        # one tuple so other threads never pair a frame with another's boxes
+        self.candidate_floor = 0.1
+        self.last_detected = None
+        
+        # Optional tracking between detections, see enable_tracking()
+        self.tracker = None
+        self.detect_interval = 1
+        self.min_track_confidence = 0.5
+        self.frames_since_detect = 0
+        self.forwards_run = 0
+        self.forwards_skipped = 0
+        
+        # Optional motion gating, see enable_motion_gate()
+        self.motion_gate = None
+        self.last_detections = None
+        
+        # Optional latency budget, see enable_quality_control()
+        self.quality = None
+        
+        # Optional tiled inference for large frames, see enable_tiling()
+        self.tiling = None
+        self.last_tile_timings = None
+        
+        # Optional detection history on disk, see enable_recording()
+        self.recorder = None
+        self.record_stream = 'camera'
+        
+        # Inference configuration, possibly replaced by autotune_model()
+        self.backend = 'DNN_BACKEND_OPENCV'
+        self.target = 'DNN_TARGET_CPU'
+        self.num_threads = None
+        self.autotune = autotune
+        self.target_ms = target_ms
+        self.tuning = None
+        
+        self.model_dir = model_dir or default_cache_dir()
+        self.config_path = self.spec.config and os.path.join(self.model_dir, self.spec.config)
+        self.weights_path = os.path.join(self.model_dir, self.spec.weights)
         
         # Download and load the model
-        self.download_models()
+        download = bool(self.spec.urls)
+        if load_async:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+            self.ready = executor.submit(self._prepare_model, download)
+            executor.shutdown(wait=False)
+        else:
+            self._prepare_model(download)
+            self.ready = Future()
+            self.ready.set_result(self)
+            
+    def _prepare_model(self, download):
+        """Download (if needed) and load the model, recording how long it took"""
+        if download:
+            start = time.perf_counter()
+            self.download_models()
+            self.startup_timings['download'] = round(time.perf_counter() - start, 4)
+        start = time.perf_counter()
         self.load_model()
+        self.startup_timings['model_load'] = round(time.perf_counter() - start, 4)
+        if self.autotune:
+            start = time.perf_counter()
+            self.autotune_model(self.target_ms)
+            self.startup_timings['autotune'] = round(time.perf_counter() - start, 4)
+        return self
         
-    def download_models(self):
-        """Download the required model files"""
-        os.makedirs('models', exist_ok=True)
-        
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        
-        # URLs for YOLOv3 model files
-        model_files = {
-            'models/yolov3.cfg': 
-                'https://raw.githubusercontent.com/pjreddie/darknet/master/cfg/yolov3.cfg',
-            'models/yolov3.weights':
-                'https://pjreddie.com/media/files/yolov3.weights',
-            'models/coco.names':
-                'https://raw.githubusercontent.com/pjreddie/darknet/master/data/coco.names'
-        }
+    @property
+    def is_ready(self):
+        """True once the model has loaded successfully"""
+        return self.ready.done() and self.ready.exception() is None
+        
+    def wait_until_ready(self, timeout=None):
+        """Block until the model is loaded, re-raising any loading error"""
+        return self.ready.result(timeout)
         
-        # Download files if they don't exist
-        for file_path, url in model_files.items():
+    def download_models(self):
+        """Download the model's missing files into the model cache"""
+        for name, url in self.spec.urls.items():
+            file_path = os.path.join(self.model_dir, name)
             if not os.path.exists(file_path):
                 print(f"Downloading {file_path}...")
+                sha256 = self.spec.sha256.get(name)
                 try:
-                    with urllib.request.urlopen(url, context=ssl_context) as response:
-                        content = response.read()
-                        with open(file_path, 'wb') as f:
-                            f.write(content)
+                    download_file(url, file_path, sha256=sha256)
                     print(f"Downloaded {file_path}")
+                    if sha256 is None:
+                        print(f"Warning: no SHA-256 is pinned for {name}, it was not verified "
+                              f"(got {file_sha256(file_path)})")
                 except Exception as e:
                     print(f"Error downloading {file_path}: {e}")
                     raise
@@ -70,21 +258,27 @@ class ObjectDetector:
         """Load the pre-trained model"""
         try:
             print("Loading model files...")
-            config_path = 'models/yolov3.cfg'
-            weights_path = 'models/yolov3.weights'
+            config_path = self.config_path
+            weights_path = self.weights_path
             
-            if not os.path.exists(config_path):
+            if config_path is not None and not os.path.exists(config_path):
                 raise FileNotFoundError("Config file not found")
             if not os.path.exists(weights_path):
                 raise FileNotFoundError("Weights file not found")
                 
-            # Load YOLO model
-            print("Initializing DNN module...")
-            self.model = cv2.dnn.readNetFromDarknet(config_path, weights_path)
+            # Load the network with the importer matching its format
+            print(f"Initializing DNN module ({self.spec.name}, {self.input_size}x{self.input_size})...")
+            model = self.spec.load(config_path, weights_path)
             
             # Set backend and target
-            self.model.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-            self.model.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            model.setPreferableBackend(getattr(cv2.dnn, self.backend))
+            model.setPreferableTarget(getattr(cv2.dnn, self.target))
+            if self.num_threads is not None:
+                cv2.setNumThreads(self.num_threads)
+            
+            # Resolve the output layers once instead of on every forward pass
+            self.output_layers = list(model.getUnconnectedOutLayersNames())
+            self.model = model
             
             print("Model loaded successfully")
             
@@ -92,8 +286,55 @@ class ObjectDetector:
             print(f"Error loading model: {e}")
             raise
 
-    def start_camera(self):
-        """Start the webcam capture with error handling"""
+    def autotune_model(self, target_ms=None, force=False):
+        """
+        Benchmark backend/target, OpenCV thread count and input size on
+        synthetic frames and switch to the fastest configuration that meets
+        target_ms. Results are stored per host in the model cache and reused
+        on later calls unless force is set.
+        Note that the OpenCV thread count is process-wide.
+        Args:
+            target_ms: latency budget per frame; without one only the
+                backend and thread count are tuned
+            force: re-tune even if the profile has a matching entry
+        Returns:
+            dict: the configuration in use
+        """
+        from autotune import Autotuner, load_profile, profile_path, save_profile
+        
+        # A fixed input size is part of what was tuned
+        sizes = None
+        key = f"{self.spec.name}:{os.path.basename(self.weights_path)}"
+        if self.fixed_input_size or target_ms is None:
+            sizes = [self.input_size]
+            key += f"@{self.input_size}"
+            
+        path = profile_path(self.model_dir)
+        config = None if force else load_profile(key, path)
+        if config is not None and config.get('target_ms') == target_ms:
+            print(f"Using tuned configuration from {path}")
+            Autotuner.apply(self.model, config)
+        else:
+            print("Tuning inference configuration...")
+            config = Autotuner(self.model, target_ms, sizes=sizes).run()
+            save_profile(key, config, path)
+            
+        self.backend = config['backend']
+        self.target = config['target']
+        self.num_threads = config['threads']
+        self.input_size = config['input_size']
+        self.tuning = config
+        print(f"Inference: {self.backend}/{self.target}, {self.num_threads} threads, "
+              f"{self.input_size}x{self.input_size} ({config['latency_ms']:.1f} ms)")
+        return config
+        
+    def start_camera(self, index=0, timeout=5.0):
+        """
+        Start the webcam capture with error handling
+        Args:
+            index: camera device index
+            timeout: seconds to wait for the first valid frame
+        """
         try:
             print("Initializing camera...")
             if self.cap is not None:
@@ -101,12 +342,24 @@ class ObjectDetector:
                 self.cap = None
             
             # Initialize camera
-            self.cap = cv2.VideoCapture(0)
-            time.sleep(2) 
+            start = time.perf_counter()
+            self.cap = cv2.VideoCapture(index)
             
             if not self.cap.isOpened():
                 raise ValueError("Could not open webcam")
                 
+            # Poll until the camera delivers a real frame instead of
+            # sleeping a fixed time
+            deadline = start + timeout
+            while True:
+                ret, frame = self.cap.read()
+                if ret and frame is not None and frame.size > 0:
+                    break
+                if time.perf_counter() > deadline:
+                    raise ValueError("Webcam did not deliver a frame")
+                time.sleep(0.01)
+                
+            self.startup_timings['camera_start'] = round(time.perf_counter() - start, 4)
             print("Camera started successfully")
                 
         except Exception as e:
@@ -118,103 +371,527 @@ class ObjectDetector:
             
     def stop_camera(self):
         """Release the webcam"""
+        self.stop_pipeline()
         if self.cap is not None:
             self.cap.release()
             self.cap = None
             print("Camera stopped")
             
+    def close(self):
+        """Release the camera and any background workers"""
+        self.stop_camera()
+        self.disable_recording()
+        
     def set_confidence_threshold(self, conf):
         """Set confidence threshold for detection"""
         self.conf_threshold = float(conf)
+        
+    def set_class_thresholds(self, thresholds):
+        """
+        Override the confidence threshold for individual classes
+        Args:
+            thresholds: dict of class name -> threshold, None to clear a class
+        """
+        class_thresholds = self.class_thresholds.copy()
+        for name, conf in thresholds.items():
+            class_thresholds[self.classes.index(name)] = np.nan if conf is None else conf
+        self.class_thresholds = class_thresholds
+        
+    def set_class_filter(self, allow=None, deny=None):
+        """
+        Restrict detection to some classes
+        Args:
+            allow: class names to keep, None to keep every class
+            deny: class names to drop, applied after allow
+        """
+        class_mask = np.ones(len(self.classes), dtype=bool)
+        if allow is not None:
+            class_mask[:] = False
+            class_mask[[self.classes.index(name) for name in allow]] = True
+        if deny is not None:
+            class_mask[[self.classes.index(name) for name in deny]] = False
+        self.class_mask = class_mask
+        
+    def enable_tracking(self, detect_interval=1, min_track_confidence=0.5, **tracker_args):
+        """
+        Track objects between detections and run the network only every
+        detect_interval frames
+        Args:
+            detect_interval: run detection on every Nth processed frame
+            min_track_confidence: detect on the next frame instead of waiting
+                for the interval when the last detection matched the tracks'
+                predictions worse than this (Tracker.confidence, 0..1)
+            tracker_args: passed on to tracker.Tracker
+        """
+        from tracker import Tracker
+        
+        self.tracker = Tracker(**tracker_args)
+        self.detect_interval = max(1, int(detect_interval))
+        self.min_track_confidence = min_track_confidence
+        # Make the first processed frame a detection
+        self.frames_since_detect = self.detect_interval
+        
+    def disable_tracking(self):
+        """Go back to running detection on every frame"""
+        self.tracker = None
+        self.detect_interval = 1
+        
+    def enable_motion_gate(self, threshold=2.0, max_stale=30, **gate_args):
+        """
+        Reuse the previous detections while the scene is not changing
+        Args:
+            threshold: mean gray-level difference below which a frame is
+                treated as unchanged
+            max_stale: force a fresh detection after this many reused frames
+            gate_args: passed on to motion.MotionGate
+        """
+        from motion import MotionGate
+        
+        self.motion_gate = MotionGate(threshold=threshold, max_stale=max_stale, **gate_args)
+        
+    def disable_motion_gate(self):
+        """Run the detection path on every frame again"""
+        self.motion_gate = None
+        
+    def enable_quality_control(self, target_ms=None, target_fps=None, **controller_args):
+        """
+        Hold a latency budget by lowering the input size, skipping frames
+        (tracking in between) and capping NMS candidates when frames get
+        slow, and stepping back up when there is headroom
+        Args:
+            target_ms: average processed-frame latency to stay under
+            target_fps: alternatively, the frame rate to hold
+            controller_args: passed on to quality.QualityController
+        """
+        from quality import QualityController
+        
+        self.disable_quality_control()
+        self.quality = QualityController(self, target_ms=target_ms, target_fps=target_fps,
+                                         **controller_args)
+        
+    def disable_quality_control(self):
+        """Stop adapting and go back to the best operating point"""
+        if self.quality is not None:
+            self.quality.apply(0)
+            self.quality = None
             
-    def get_frame(self):
+    def enable_tiling(self, tile_size=None, grid=None, overlap=0.2, full_frame=True):
         """
-        Get a frame from webcam and perform detection
+        Detect on overlapping tiles of frames larger than a tile, so small
+        objects are not lost when the frame is scaled to the network input
+        Args:
+            tile_size: tile side in frame pixels, twice the input size by default
+            grid: (columns, rows) to split frames into instead of a tile size
+            overlap: fraction of a tile shared with its neighbours
+            full_frame: also detect on the whole frame, for large objects
+        """
+        from tiling import TileLayout
+        
+        self.tiling = TileLayout(tile_size or 2 * self.input_size, grid=grid,
+                                 overlap=overlap, full_frame=full_frame)
+        
+    def disable_tiling(self):
+        """Go back to detecting on the whole frame"""
+        self.tiling = None
+        self.last_tile_timings = None
+        
+    def enable_recording(self, path, stream='camera', **recorder_args):
+        """
+        Append the detections of every processed frame to a detection log
+        Args:
+            path: log directory, appended to if it exists
+            stream: name the frames are recorded under
+            recorder_args: passed on to recorder.DetectionRecorder
+        """
+        from recorder import DetectionRecorder
+        
+        self.disable_recording()
+        self.recorder = DetectionRecorder(path, self.classes, **recorder_args)
+        self.record_stream = stream
+        
+    def disable_recording(self):
+        """Write out what is queued and stop recording"""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+            
+    @property
+    def operating_point(self):
+        """Current quality controller settings, None when it is disabled"""
+        quality = self.quality
+        return None if quality is None else quality.operating_point
+        
+    @property
+    def motion_skipped(self):
+        """Number of frames the motion gate answered with reused detections"""
+        return 0 if self.motion_gate is None else self.motion_gate.frames_skipped
+        
+    def refilter(self, detected=None):
+        """
+        Re-apply the current thresholds and class filter to the last
+        detected frame. Boxes the tracker saw keep their track ids.
+        Args:
+            detected: a last_detected tuple, the current one by default
         Returns:
-            tuple: (processed_frame, detections)
+            Detections: for the last detected frame, or None if there is none
+            or a threshold is below candidate_floor
         """
-        if self.cap is None or not self.cap.isOpened():
-            print("Camera is not initialized")
+        if detected is None:
+            detected = self.last_detected
+        if detected is None or self._min_threshold() < self.candidate_floor:
+            # Candidates below the floor were not kept, only a new forward
+            # pass can show them
+            return None
+        _, candidates, tracked = detected
+        detections = self._filter(*candidates)
+        if tracked is not None and tracked.track_ids is not None:
+            # Surviving boxes are identical to the tracked ones
+            same = (detections.boxes[:, None, :] == tracked.boxes[None, :, :]).all(axis=2)
+            track_ids = tracked.track_ids[same.argmax(axis=1)] if len(tracked) else 0
+            detections.track_ids = np.where(same.any(axis=1), track_ids, -1).astype(np.int32)
+        return detections
+        
+    def redraw(self):
+        """
+        Re-filter and annotate the last detected frame with the current settings
+        Returns:
+            tuple: (annotated_frame, detections) or (None, []) if there is
+            no frame yet or the next detection has to be waited for
+        """
+        from annotate import draw_detections
+        
+        detected = self.last_detected
+        detections = None if detected is None else self.refilter(detected)
+        if detections is None:
             return None, []
+        return draw_detections(detected[0].copy(), detections), detections.to_dicts()
+        
+    def start_pipeline(self, source=None):
+        """
+        Run capture and inference on background threads
+        Args:
+            source: object with a cv2.VideoCapture-style read() method,
+                defaults to the webcam opened by start_camera()
+        """
+        from pipeline import DetectionPipeline
+        
+        if source is None:
+            if self.cap is None or not self.cap.isOpened():
+                raise ValueError("Camera is not initialized")
+            source = self.cap
             
-        try:
-            ret, frame = self.cap.read()
-            if not ret or frame is None:
-                print("Failed to capture frame")
-                return None, []
-            
-            frame = cv2.flip(frame, 1)
+        self.stop_pipeline()
+        self.pipeline = DetectionPipeline(self, source)
+        self.pipeline.start()
+        
+    def stop_pipeline(self):
+        """Stop the background pipeline if it is running"""
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
             
-            (H, W) = frame.shape[:2]
+    def get_latest_result(self):
+        """
+        Get the newest result produced by the background pipeline
+        Returns:
+            tuple: (seq, processed_frame, detections) or None if no frame
+            has been processed yet
+        """
+        if self.pipeline is None:
+            return None
+        return self.pipeline.get_latest()
+        
+    def read_frame(self, source=None):
+        """
+        Read and mirror the next frame from a capture source
+        Returns:
+            numpy.ndarray: BGR frame, or None if no frame could be read
+        """
+        source = self.cap if source is None else source
+        with self.metrics.stage('capture'):
+            ret, frame = source.read()
+        if not ret or frame is None:
+            return None
+        with self.metrics.stage('flip'):
+            return cv2.flip(frame, 1)
+        
+    def detect(self, frame):
+        """
+        Run detection on a BGR frame without modifying it
+        Returns:
+            Detections: boxes, scores and class ids of the detected objects
+        """
+        if self.tiling is not None and self.tiling.applies(frame):
+            return self.detect_tiled(frame)
             
+        with self.metrics.stage('blob'):
             blob = cv2.dnn.blobFromImage(
                 frame,
                 1/255.0,
-                (416, 416),
+                (self.input_size, self.input_size),
                 swapRB=True,
                 crop=False
             )
+        
+        outputs = self._frame_outputs(self._forward(blob), 0)
+        detections = self._postprocess(outputs, frame.shape[1], frame.shape[0], frame=frame)
+        self.metrics.tick('inference')
+        return detections
+        
+    def process_frame(self, frame):
+        """
+        Run detection on a BGR frame and draw the results into it
+        Returns:
+            tuple: (annotated_frame, detections)
+        """
+        from annotate import draw_detections
+        
+        start = time.perf_counter()
+        detections = self.detect_tracked(frame)
+        if self.recorder is not None:
+            self.recorder.record(detections, self.record_stream)
+        with self.metrics.stage('draw'):
+            draw_detections(frame, detections)
+        if self.quality is not None:
+            self.quality.update((time.perf_counter() - start) * 1000)
+        return frame, detections.to_dicts()
+        
+    def detect_tracked(self, frame):
+        """
+        Run detection or, between detections, the tracker's prediction.
+        With a motion gate, unchanged frames reuse the previous result.
+        Returns:
+            Detections: with track_ids when tracking is enabled
+        """
+        if self.motion_gate is not None and self.last_detections is not None:
+            with self.metrics.stage('gate'):
+                changed = self.motion_gate.should_run(frame)
+            if not changed:
+                self.forwards_skipped += 1
+                return self.last_detections
+        elif self.motion_gate is not None:
+            self.motion_gate.should_run(frame)
+            
+        if self.tracker is None:
+            self.forwards_run += 1
+            detections = self.detect(frame)
+        elif (self.frames_since_detect + 1 >= self.detect_interval or
+              self.tracker.confidence < self.min_track_confidence):
+            self.frames_since_detect = 0
+            self.forwards_run += 1
+            detections = self.tracker.update(self.detect(frame))
+            self._remember_tracked(detections)
+        else:
+            self.frames_since_detect += 1
+            self.forwards_skipped += 1
+            detections = self.tracker.predict()
             
-            # Get output layer names
-            layer_names = self.model.getLayerNames()
-            output_layers = [layer_names[i - 1] for i in self.model.getUnconnectedOutLayers()]
+        self.last_detections = detections
+        return detections
+        
+    def detect_batch(self, frames):
+        """
+        Run detection on several BGR frames with a single forward pass
+        Args:
+            frames: sequence of BGR frames, sizes may differ
+        Returns:
+            list: one Detections per frame, identical to the per-frame path
+        """
+        if len(frames) == 0:
+            return []
+        if self.tiling is not None:
+            # Each large frame already fills a batch with its tiles
+            return [self.detect(frame) for frame in frames]
             
-            # Pass the blob through the network and obtain detections
+        with self.metrics.stage('blob'):
+            blob = cv2.dnn.blobFromImages(
+                frames,
+                1/255.0,
+                (self.input_size, self.input_size),
+                swapRB=True,
+                crop=False
+            )
+        outputs = self._forward(blob)
+        
+        results = []
+        for i, frame in enumerate(frames):
+            (H, W) = frame.shape[:2]
+            results.append(self._postprocess(self._frame_outputs(outputs, i), W, H))
+            self.metrics.tick('inference')
+        return results
+        
+    def detect_tiled(self, frame):
+        """
+        Run detection on overlapping tiles of a BGR frame, map the tile boxes
+        back to frame coordinates and merge them with one NMS pass.
+        The per-tile timing breakdown is kept in last_tile_timings.
+        Returns:
+            Detections: for the whole frame
+        """
+        start = time.perf_counter()
+        (H, W) = frame.shape[:2]
+        tiles = self.tiling.tiles(W, H)
+        crops = [frame[y:y + h, x:x + w] for (x, y, w, h) in tiles]
+        floor = min(self._min_threshold(), self.candidate_floor)
+        candidates, timings = self._tile_candidates(crops, floor)
+        
+        merge_start = time.perf_counter()
+        boxes, confidences, class_ids = [], [], []
+        for (x, y, w, h), tile_candidates, tile in zip(tiles, candidates, timings['tiles']):
+            # Shift tile boxes to frame coordinates
+            tile_boxes = tile_candidates[0]
+            tile_boxes[:, 0:2] += (x, y)
+            boxes.append(tile_boxes)
+            confidences.append(tile_candidates[1])
+            class_ids.append(tile_candidates[2])
+            tile.update(x=x, y=y, w=w, h=h, candidates=len(tile_boxes))
+        merged = (np.concatenate(boxes), np.concatenate(confidences), np.concatenate(class_ids))
+        self.last_detected = (frame.copy(), merged, None)
+        detections = self._filter(*merged)
+        
+        done = time.perf_counter()
+        timings['merge_ms'] = round((done - merge_start) * 1000, 3)
+        timings['total_ms'] = round((done - start) * 1000, 3)
+        self.last_tile_timings = timings
+        self.metrics.tick('inference')
+        return detections
+        
+    def _tile_candidates(self, crops, floor):
+        """
+        Decode candidates for every tile from a single batched forward pass
+        Returns:
+            tuple: (list of (boxes, confidences, class_ids) in tile
+            coordinates, timings dict with a 'tiles' list of per-tile entries)
+        """
+        start = time.perf_counter()
+        with self.metrics.stage('blob'):
+            blob = cv2.dnn.blobFromImages(
+                crops,
+                1/255.0,
+                (self.input_size, self.input_size),
+                swapRB=True,
+                crop=False
+            )
+        blob_done = time.perf_counter()
+        outputs = self._forward(blob)
+        forward_done = time.perf_counter()
+        
+        candidates = []
+        tiles = []
+        for i, crop in enumerate(crops):
+            tile_start = time.perf_counter()
+            (h, w) = crop.shape[:2]
+            with self.metrics.stage('decode'):
+                candidates.append(decode_outputs(self._frame_outputs(outputs, i), w, h, floor))
+            tiles.append({'decode_ms': round((time.perf_counter() - tile_start) * 1000, 3)})
+            
+        return candidates, {
+            'tiles': tiles,
+            'blob_ms': round((blob_done - start) * 1000, 3),
+            'forward_ms': round((forward_done - blob_done) * 1000, 3),
+        }
+        
+    def _forward(self, blob):
+        """Pass a blob through the network and return the raw outputs"""
+        with self.metrics.stage('forward'):
             self.model.setInput(blob)
-            outputs = self.model.forward(output_layers)
-            
-            # Initialize lists for detected objects
-            boxes = []
-            confidences = []
-            class_ids = []
-            
-            # Process detections
-            for output in outputs:
-                for detection in output:
-                    scores = detection[5:]
-                    class_id = np.argmax(scores)
-                    confidence = scores[class_id]
-                    
-                    if confidence > self.conf_threshold:
-                        box = detection[0:4] * np.array([W, H, W, H])
-                        (centerX, centerY, width, height) = box.astype("int")
-                        
-                        x = int(centerX - (width / 2))
-                        y = int(centerY - (height / 2))
-                        
-                        boxes.append([x, y, int(width), int(height)])
-                        confidences.append(float(confidence))
-                        class_ids.append(class_id)
-            
-            indices = cv2.dnn.NMSBoxes(boxes, confidences, self.conf_threshold, 0.3)
-            
-            results = []
-            if len(indices) > 0:
-                for i in indices.flatten():
-                    (x, y) = (boxes[i][0], boxes[i][1])
-                    (w, h) = (boxes[i][2], boxes[i][3])
-                    
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                    text = f"{self.classes[class_ids[i]]}: {confidences[i]:.2f}"
-                    cv2.putText(frame, text, (x, y - 5),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                    
-                    results.append({
-                        'class': self.classes[class_ids[i]],
-                        'confidence': confidences[i],
-                        'box': (x, y, x + w, y + h)
-                    })
-            
-            # Convert frame to RGB for tkinter
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Convert to PIL Image and then to CTkImage
-            pil_image = Image.fromarray(frame_rgb)
-            ctk_image = ctk.CTkImage(light_image=pil_image, 
-                                   dark_image=pil_image,
-                                   size=pil_image.size)
-            
-            return ctk_image, results
+            return self.model.forward(self.output_layers)
+        
+    def _frame_outputs(self, outputs, i):
+        """
+        Outputs of image i of a batch, converted to darknet-style rows
+        Returns:
+            list: (N, 5 + num_classes) arrays for decode_outputs()
+        """
+        # Darknet batches are (batch, rows, 5 + classes) and single images
+        # (rows, 5 + classes); ONNX exports always keep the batch axis
+        if self.spec.framework == 'darknet':
+            outputs = [out[i] if out.ndim == 3 else out for out in outputs]
+        else:
+            outputs = [out[i] for out in outputs]
+        return self.adapter(outputs, self.input_size)
+        
+    def _postprocess(self, outputs, W, H, frame=None):
+        """
+        Decode, threshold and NMS the outputs for one frame of size W x H
+        Args:
+            frame: keep a copy of it and the decoded candidates for redraw()
+        """
+        floor = self._min_threshold()
+        if frame is not None:
+            floor = min(floor, self.candidate_floor)
+            
+        # Decode all candidates at once
+        with self.metrics.stage('decode'):
+            boxes, confidences, class_ids = decode_outputs(outputs, W, H, floor)
+        
+        if frame is not None:
+            self.last_detected = (frame.copy(), (boxes, confidences, class_ids), None)
+        return self._filter(boxes, confidences, class_ids)
+        
+    def _remember_tracked(self, detections):
+        """Attach the tracked detections of the last detected frame for redraw()"""
+        detected = self.last_detected
+        if detected is not None:
+            self.last_detected = (detected[0], detected[1], detections)
+        
+    def _min_threshold(self):
+        """Lowest threshold any class can currently pass with"""
+        class_min = np.nanmin(self.class_thresholds, initial=np.inf)
+        return min(self.conf_threshold, float(class_min))
+        
+    def _filter(self, boxes, confidences, class_ids):
+        """Apply per-class thresholds, the class filter and NMS to candidates"""
+        thresholds = np.where(np.isnan(self.class_thresholds),
+                              self.conf_threshold, self.class_thresholds)
+        keep = (confidences > thresholds[class_ids]) & self.class_mask[class_ids]
+        boxes, confidences, class_ids = boxes[keep], confidences[keep], class_ids[keep]
+        
+        # Bound NMS cost on cluttered frames by keeping only the best candidates
+        limit = self.max_candidates
+        if limit is not None and len(confidences) > limit:
+            top = np.argpartition(-confidences, limit - 1)[:limit]
+            boxes, confidences, class_ids = boxes[top], confidences[top], class_ids[top]
+        
+        with self.metrics.stage('nms'):
+            indices = cv2.dnn.NMSBoxes(boxes, confidences, 0.0, self.nms_threshold)
+        if len(indices) == 0:
+            return Detections.empty(self.classes)
+            
+        keep = np.asarray(indices).flatten()
+        
+        # Convert [x, y, w, h] to corner form
+        kept_boxes = boxes[keep]
+        kept_boxes[:, 2:4] += kept_boxes[:, 0:2]
+        
+        return Detections(kept_boxes, confidences[keep], class_ids[keep], self.classes)
+        
+    def to_ctk_image(self, frame):
+        """Convert a BGR frame into a CTkImage for display"""
+        from ui import to_ctk_image
+        
+        with self.metrics.stage('convert'):
+            return to_ctk_image(frame)
+            
+    def get_frame(self):
+        """
+        Get a frame from webcam and perform detection
+        Returns:
+            tuple: (processed_frame, detections)
+        """
+        if self.cap is None or not self.cap.isOpened():
+            print("Camera is not initialized")
+            return None, []
+            
+        try:
+            frame = self.read_frame()
+            if frame is None:
+                print("Failed to capture frame")
+                return None, []
+            
+            frame, results = self.process_frame(frame)
+            
+            return self.to_ctk_image(frame), results
             
         except Exception as e:
             print(f"Error processing frame: {e}")
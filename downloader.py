@@ -0,0 +1,153 @@
+import hashlib
+import http.client
+import os
+import ssl
+import time
+import urllib.error
+import urllib.request
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CHUNK_SIZE = 1 << 20
+
+
+def default_cache_dir():
+    """
+    Shared model cache directory: $OBJECT_DETECTOR_CACHE if set, otherwise
+    ai-object-detector under the user's cache directory
+    """
+    path = os.environ.get('OBJECT_DETECTOR_CACHE')
+    if path:
+        return os.path.expanduser(path)
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'ai-object-detector')
+
+
+class FileLock:
+    def __init__(self, path):
+        """Exclusive inter-process lock held on a lock file while in a with block"""
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+        return False
+
+
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_file(url, dest, sha256=None, chunk_size=CHUNK_SIZE, retries=3,
+                  timeout=30, context=None):
+    """
+    Download url to dest with constant memory use.
+
+    Data is streamed into dest + '.part', resuming an earlier partial
+    download with an HTTP Range request when the server supports it, then
+    checked against sha256 (if given) and atomically renamed into place.
+    A lock file next to dest lets several processes share one cache: the
+    first downloads, the others wait and then reuse the finished file.
+
+    Args:
+        sha256: expected hex digest, None to skip verification
+        retries: attempts to resume after a dropped connection
+        timeout: socket timeout in seconds
+        context: ssl.SSLContext, a verifying default context if None
+    Returns:
+        str: dest
+    """
+    directory = os.path.dirname(os.path.abspath(dest))
+    os.makedirs(directory, exist_ok=True)
+    part_path = dest + '.part'
+    context = context or ssl.create_default_context()
+
+    with FileLock(dest + '.lock'):
+        if os.path.exists(dest):
+            if sha256 is None or file_sha256(dest) == sha256:
+                return dest
+            print(f"Checksum mismatch for {dest}, downloading again")
+            os.remove(dest)
+
+        for attempt in range(retries + 1):
+            try:
+                _fetch(url, part_path, chunk_size, timeout, context)
+                break
+            except (urllib.error.URLError, http.client.HTTPException,
+                    ConnectionError, TimeoutError) as e:
+                if isinstance(e, urllib.error.HTTPError) and e.code < 500:
+                    raise
+                if attempt == retries:
+                    raise
+                print(f"Download of {url} interrupted ({e}), resuming...")
+                time.sleep(min(2 ** attempt, 10))
+
+        if sha256 is not None:
+            actual = file_sha256(part_path)
+            if actual != sha256:
+                os.remove(part_path)
+                raise ValueError(f"Checksum mismatch for {url}: expected {sha256}, got {actual}")
+
+        os.replace(part_path, dest)
+    return dest
+
+
+def _fetch(url, part_path, chunk_size, timeout, context):
+    """Stream url into part_path, continuing from its current size"""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header('Range', f'bytes={offset}-')
+
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout, context=context)
+    except urllib.error.HTTPError as e:
+        # The partial file already holds everything the server has
+        if e.code == 416 and offset:
+            return
+        raise
+
+    with response:
+        if offset and response.status != 206:
+            # Server ignored the Range header, start over
+            offset = 0
+        total = response.headers.get('Content-Length')
+        total = int(total) + offset if total is not None else None
+
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            received = offset
+            while True:
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                received += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+    if total is not None and received < total:
+        raise http.client.IncompleteRead(b'', total - received)
@@ -0,0 +1,130 @@
+import collections
+import contextlib
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=True, window=300, log_interval=None, log_file=None):
+        """
+        Rolling per-stage latency and FPS counters
+        Args:
+            enabled: when False, stage() and tick() do nothing
+            window: number of recent samples kept per stage
+            log_interval: seconds between JSON log lines, None to disable
+            log_file: stream for log lines, defaults to stdout
+        """
+        self.enabled = enabled
+        self.window = window
+        self.log_interval = log_interval
+        self.log_file = log_file
+
+        self.stages = {}
+        self.ticks = {}
+        self.lock = threading.Lock()
+        self.last_log = time.perf_counter()
+
+    def stage(self, name):
+        """
+        Time a block of code as one sample of a stage
+        Usage:
+            with metrics.stage('forward'):
+                ...
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def record(self, name, seconds):
+        """Add one latency sample in seconds to a stage"""
+        samples = self.stages.get(name)
+        if samples is None:
+            with self.lock:
+                samples = self.stages.setdefault(
+                    name, collections.deque(maxlen=self.window)
+                )
+        samples.append(seconds)
+
+    def tick(self, name='frames'):
+        """Count one event of a rate counter, e.g. a processed frame"""
+        if not self.enabled:
+            return
+        times = self.ticks.get(name)
+        if times is None:
+            with self.lock:
+                times = self.ticks.setdefault(
+                    name, collections.deque(maxlen=self.window)
+                )
+        times.append(time.perf_counter())
+        self.maybe_log()
+
+    def reset(self):
+        """Drop all collected samples"""
+        with self.lock:
+            self.stages = {}
+            self.ticks = {}
+
+    def snapshot(self):
+        """
+        Summarize the current window
+        Returns:
+            dict: {'stages': {name: {'count', 'mean_ms', 'p50_ms', 'p95_ms',
+            'p99_ms'}}, 'fps': {name: rate}}
+        """
+        with self.lock:
+            stages = {name: list(samples) for name, samples in self.stages.items()}
+            ticks = {name: list(times) for name, times in self.ticks.items()}
+
+        stage_stats = {}
+        for name, samples in stages.items():
+            if not samples:
+                continue
+            ms = np.array(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+            stage_stats[name] = {
+                'count': len(ms),
+                'mean_ms': round(float(ms.mean()), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+            }
+
+        fps = {}
+        for name, times in ticks.items():
+            if len(times) > 1 and times[-1] > times[0]:
+                fps[name] = round((len(times) - 1) / (times[-1] - times[0]), 2)
+
+        return {'stages': stage_stats, 'fps': fps}
+
+    def maybe_log(self):
+        """Print a JSON snapshot line if log_interval has elapsed"""
+        if self.log_interval is None:
+            return
+        now = time.perf_counter()
+        if now - self.last_log < self.log_interval:
+            return
+        self.last_log = now
+        record = {'time': time.time(), 'metrics': self.snapshot()}
+        print(json.dumps(record), file=self.log_file or sys.stdout, flush=True)
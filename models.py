@@ -0,0 +1,199 @@
+import os
+import sys
+
+import numpy as np
+
+# COCO dataset class names
+COCO_CLASSES = ["person", "bicycle", "car", "motorcycle", "airplane", "bus",
+                "train", "truck", "boat", "traffic light", "fire hydrant",
+                "stop sign", "parking meter", "bench", "bird", "cat", "dog",
+                "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe",
+                "backpack", "umbrella", "handbag", "tie", "suitcase", "frisbee",
+                "skis", "snowboard", "sports ball", "kite", "baseball bat",
+                "baseball glove", "skateboard", "surfboard", "tennis racket",
+                "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl",
+                "banana", "apple", "sandwich", "orange", "broccoli", "carrot",
+                "hot dog", "pizza", "donut", "cake", "chair", "couch",
+                "potted plant", "bed", "dining table", "toilet", "tv", "laptop",
+                "mouse", "remote", "keyboard", "cell phone", "microwave", "oven",
+                "toaster", "sink", "refrigerator", "book", "clock", "vase",
+                "scissors", "teddy bear", "hair drier", "toothbrush"]
+
+INPUT_SIZES = (320, 416, 608)
+
+
+def darknet_outputs(outputs, input_size):
+    """Darknet YOLO layers already give normalized [cx, cy, w, h, obj, scores...] rows"""
+    return outputs
+
+
+def yolov5_outputs(outputs, input_size):
+    """
+    YOLOv5-style ONNX exports give [cx, cy, w, h, obj, class probs...] rows in
+    input pixels; normalize boxes and fold objectness into the class scores
+    """
+    rows = []
+    for out in outputs:
+        out = out.reshape(-1, out.shape[-1]).astype(np.float32, copy=True)
+        out[:, 0:4] /= input_size
+        out[:, 5:] *= out[:, 4:5]
+        rows.append(out)
+    return rows
+
+
+def yolov8_outputs(outputs, input_size):
+    """
+    YOLOv8-style ONNX exports give a (4 + classes, N) matrix in input pixels
+    without objectness; transpose into darknet rows
+    """
+    rows = []
+    for out in outputs:
+        out = out.reshape(out.shape[-2], out.shape[-1]).T
+        converted = np.empty((out.shape[0], out.shape[1] + 1), dtype=np.float32)
+        converted[:, 0:4] = out[:, 0:4] / input_size
+        converted[:, 4] = 1.0
+        converted[:, 5:] = out[:, 4:]
+        rows.append(converted)
+    return rows
+
+
+OUTPUT_ADAPTERS = {
+    'darknet': darknet_outputs,
+    'yolov5': yolov5_outputs,
+    'yolov8': yolov8_outputs,
+}
+
+
+class ModelSpec:
+    def __init__(self, name, weights, config=None, framework='darknet', classes=None,
+                 input_size=416, adapter='darknet', urls=None, sha256=None):
+        """
+        Description of a detection model that ObjectDetector can load
+        Args:
+            name: registry name
+            weights: weights file (Darknet .weights or .onnx), either a file
+                name in the model cache or an absolute path
+            config: Darknet .cfg file, same rules as weights
+            framework: 'darknet' or 'onnx'
+            classes: list of class names or the path of a names file,
+                COCO class names by default
+            input_size: default square network input size, a multiple of 32
+            adapter: key in OUTPUT_ADAPTERS for the model's output layout
+            urls: dict of file name -> download URL for missing files
+            sha256: dict of file name -> expected SHA-256 digest
+        """
+        if framework not in ('darknet', 'onnx'):
+            raise ValueError(f"Unknown model framework: {framework}")
+        if framework == 'darknet' and config is None:
+            raise ValueError("Darknet models need a config file")
+        if adapter not in OUTPUT_ADAPTERS:
+            raise ValueError(f"Unknown output adapter: {adapter}")
+        self.name = name
+        self.weights = weights
+        self.config = config
+        self.framework = framework
+        self.classes = classes if classes is not None else COCO_CLASSES
+        self.input_size = check_input_size(input_size)
+        self.adapter = adapter
+        self.urls = urls or {}
+        self.sha256 = sha256 or {}
+
+    def __repr__(self):
+        return f"ModelSpec({self.name!r}, framework={self.framework!r}, input_size={self.input_size})"
+
+    def files(self):
+        """Model files as a list of file names (or paths)"""
+        return [name for name in (self.config, self.weights) if name is not None]
+
+    def load_classes(self):
+        """Class names as a list, reading the names file if one is given"""
+        if isinstance(self.classes, str):
+            with open(self.classes) as f:
+                return [line.strip() for line in f if line.strip()]
+        return list(self.classes)
+
+    def load(self, config_path, weights_path):
+        """Read the network with the matching OpenCV importer"""
+        import cv2
+
+        if self.framework == 'darknet':
+            return cv2.dnn.readNetFromDarknet(config_path, weights_path)
+        return cv2.dnn.readNet(weights_path)
+
+
+def check_input_size(size):
+    """Validate a network input size"""
+    size = int(size)
+    if size <= 0 or size % 32 != 0:
+        raise ValueError(f"Input size must be a positive multiple of 32, got {size}")
+    return size
+
+
+MODELS = {}
+
+
+def register_model(spec):
+    """Add a model to the registry, replacing any model with the same name"""
+    MODELS[spec.name] = spec
+    return spec
+
+
+def get_model(name):
+    """Look up a registered model by name"""
+    try:
+        return MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown model {name!r}, registered: {', '.join(sorted(MODELS))}")
+
+
+register_model(ModelSpec(
+    'yolov3',
+    config='yolov3.cfg',
+    weights='yolov3.weights',
+    urls={
+        'yolov3.cfg': 'https://raw.githubusercontent.com/pjreddie/darknet/master/cfg/yolov3.cfg',
+        'yolov3.weights': 'https://pjreddie.com/media/files/yolov3.weights',
+    },
+))
+
+register_model(ModelSpec(
+    'yolov3-tiny',
+    config='yolov3-tiny.cfg',
+    weights='yolov3-tiny.weights',
+    urls={
+        'yolov3-tiny.cfg': 'https://raw.githubusercontent.com/pjreddie/darknet/master/cfg/yolov3-tiny.cfg',
+        'yolov3-tiny.weights': 'https://pjreddie.com/media/files/yolov3-tiny.weights',
+    },
+))
+
+
+def main(argv=None):
+    """List the registered models with the SHA-256 of their cached files, for pinning"""
+    import argparse
+
+    from downloader import default_cache_dir, file_sha256
+
+    parser = argparse.ArgumentParser(prog='python -m models', description=main.__doc__)
+    parser.add_argument('--model-dir', help='model cache (default: the shared cache)')
+    args = parser.parse_args(argv)
+    model_dir = args.model_dir or default_cache_dir()
+
+    for name in sorted(MODELS):
+        spec = MODELS[name]
+        print(f"{name}:")
+        for file_name in spec.files():
+            path = os.path.join(model_dir, file_name)
+            actual = file_sha256(path) if os.path.exists(path) else None
+            pinned = spec.sha256.get(file_name)
+            if actual is None:
+                state = 'not downloaded'
+            elif pinned is None:
+                state = 'not pinned'
+            else:
+                state = 'ok' if actual == pinned else 'MISMATCH'
+            print(f"    {file_name}: {actual or '-'} ({state})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import cv2
+
+
+class MotionGate:
+    def __init__(self, threshold=2.0, max_stale=30, width=64):
+        """
+        Decide whether a frame differs enough from the last one that was
+        let through to be worth running the network on
+        Args:
+            threshold: mean absolute difference, in gray levels (0-255) of a
+                downscaled frame, below which the scene counts as unchanged
+            max_stale: let a frame through after this many skipped frames
+                even if nothing changed
+            width: width of the grayscale thumbnail the difference is taken on
+        """
+        self.threshold = threshold
+        self.max_stale = max_stale
+        self.width = width
+        self.reset()
+
+    def reset(self):
+        """Forget the reference frame so the next frame always passes"""
+        self.reference = None
+        self.stale = 0
+        self.last_score = None
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    def should_run(self, frame):
+        """
+        Compare a BGR frame against the reference
+        Returns:
+            bool: True if the network should run on this frame
+        """
+        small = self._thumbnail(frame)
+        self.frames_checked += 1
+
+        if self.reference is not None and self.reference.shape == small.shape:
+            self.last_score = float(cv2.absdiff(small, self.reference).mean())
+            if self.last_score < self.threshold and self.stale < self.max_stale:
+                self.stale += 1
+                self.frames_skipped += 1
+                return False
+
+        self.reference = small
+        self.stale = 0
+        return True
+
+    def _thumbnail(self, frame):
+        """Downscale first, then convert, so the color conversion stays cheap"""
+        (H, W) = frame.shape[:2]
+        height = max(1, round(H * self.width / W))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        # A light blur keeps sensor noise from counting as motion
+        return cv2.GaussianBlur(small, (3, 3), 0)
@@ -0,0 +1,466 @@
+import collections
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from detector import ObjectDetector, decode_outputs
+from pipeline import DetectionPipeline
+
+
+def _attach(name, rings):
+    """Map a ring buffer created by the parent, once per worker"""
+    shm = rings.get(name)
+    if shm is None:
+        for old in rings.values():
+            old.close()
+        rings.clear()
+        # Spawned workers share the parent's resource tracker, so the
+        # parent's unlink() also covers this mapping
+        shm = shared_memory.SharedMemory(name=name)
+        rings[name] = shm
+    return shm
+
+
+def _worker_main(worker_id, detector_args, threads, tasks, results):
+    """
+    Worker process: load a private copy of the network, then turn frames
+    from the shared ring buffer into decoded candidate arrays
+    """
+    # Keep diagnostics out of results a parent may be writing to stdout
+    sys.stdout = sys.stderr
+    cv2.setNumThreads(threads)
+    try:
+        detector = ObjectDetector(**detector_args)
+    except Exception as e:
+        results.put(('error', worker_id, None, f"Worker {worker_id} failed to load: {e}"))
+        return
+    results.put(('ready', worker_id, None, None))
+
+    rings = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, ring_name, offset, shape, input_size, floor = task
+        try:
+            shm = _attach(ring_name, rings)
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+
+            start = time.perf_counter()
+            blob = cv2.dnn.blobFromImage(frame, 1/255.0, (input_size, input_size),
+                                         swapRB=True, crop=False)
+            # blobFromImage copied the pixels, the slot can be reused now
+            del frame
+            detector.input_size = input_size
+            outputs = detector._frame_outputs(detector._forward(blob), 0)
+            forward_done = time.perf_counter()
+
+            (H, W) = shape[:2]
+            candidates = decode_outputs(outputs, W, H, floor)
+            timings = (forward_done - start, time.perf_counter() - forward_done)
+            results.put(('result', worker_id, seq, (candidates, timings)))
+        except Exception as e:
+            results.put(('failed', worker_id, seq, f"Worker {worker_id}: {e}"))
+
+    for shm in rings.values():
+        shm.close()
+
+
+class ParallelDetector(ObjectDetector):
+    def __init__(self, workers=None, slots=None, config_path=None, weights_path=None,
+                 metrics=None, load_async=False, model_dir=None, model='yolov3',
+                 input_size=None, autotune=False, target_ms=None):
+        """
+        ObjectDetector that runs the network in worker processes.
+        Each worker loads its own copy of the model. Frames are handed over
+        through a shared-memory ring buffer, and workers send back only the
+        decoded candidate arrays. Thresholds, class filters, NMS, tracking
+        and drawing stay in this process, so results are identical to the
+        in-process detector and come back in submission order.
+        submit(), collect() and the detect methods must be called from one
+        thread at a time.
+        Args:
+            workers: number of worker processes, the CPU count by default
+            slots: frames that can be in flight at once, 2 per worker by default
+            autotune, target_ms: not supported, the workers share the cores
+                so a single-process measurement does not apply; raises
+                ValueError if autotune is set
+            other args: as for ObjectDetector
+        """
+        if autotune:
+            raise ValueError("Autotuning is not supported with worker processes")
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.slots = max(self.workers, int(slots or 2 * self.workers))
+        self.processes = []
+        self.context = multiprocessing.get_context('spawn')
+        self.tasks = self.context.Queue()
+        self.results = self.context.Queue()
+
+        # Ring buffer of frame slots, resized when a bigger frame arrives
+        self.ring = None
+        self.slot_size = 0
+        self.free_slots = collections.deque()
+
+        # In-order delivery: results arriving early wait in `finished`
+        self.next_seq = 0
+        self.next_result = 0
+        self.in_flight = {}
+        self.finished = {}
+        self.submit_times = {}
+        # (forward, decode) seconds of the frame collect() returned last,
+        # and when it was submitted
+        self.last_timings = None
+        self.last_submitted = None
+        self.closed = False
+
+        super().__init__(config_path=config_path, weights_path=weights_path, metrics=metrics,
+                         load_async=load_async, model_dir=model_dir, model=model,
+                         input_size=input_size)
+
+    def _prepare_model(self, download):
+        """Download (if needed) in this process, then start the workers"""
+        if download:
+            start = time.perf_counter()
+            self.download_models()
+            self.startup_timings['download'] = round(time.perf_counter() - start, 4)
+        start = time.perf_counter()
+        self.start_workers()
+        self.startup_timings['model_load'] = round(time.perf_counter() - start, 4)
+        return self
+
+    def start_workers(self):
+        """Spawn the worker processes and wait until every one has loaded the model"""
+        detector_args = {
+            'model_dir': self.model_dir,
+            'model': self.spec,
+            'input_size': self.input_size,
+        }
+        # Split the cores between the workers instead of oversubscribing them
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        print(f"Starting {self.workers} inference workers ({threads} threads each)...")
+        for worker_id in range(self.workers):
+            process = self.context.Process(
+                target=_worker_main,
+                args=(worker_id, detector_args, threads, self.tasks, self.results),
+                name=f"inference-{worker_id}", daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        ready = 0
+        while ready < self.workers:
+            kind, worker_id, _, message = self._get_result()
+            if kind == 'error':
+                self.close()
+                raise RuntimeError(message)
+            ready += 1
+        print("Inference workers ready")
+
+    def load_model(self):
+        """Workers load their own copies of the model; see start_workers()"""
+        self.start_workers()
+
+    def close(self):
+        """Stop the worker processes and free the shared memory"""
+        if self.closed:
+            return
+        self.stop_camera()
+        self.disable_recording()
+        self.closed = True
+        for process in self.processes:
+            if process.is_alive():
+                self.tasks.put(None)
+        for process in self.processes:
+            process.join(2.0)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self._release_ring()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def submit(self, frame):
+        """
+        Queue a BGR frame for detection, waiting for a free slot if all
+        slots are in flight
+        Returns:
+            int: sequence number; results are returned by collect() in order
+        """
+        if self.closed:
+            raise RuntimeError("ParallelDetector is closed")
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        with self.metrics.stage('handoff'):
+            if frame.nbytes > self.slot_size:
+                self._resize_ring(frame.nbytes)
+            slot = self._take_slot()
+            offset = slot * self.slot_size
+            target = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.ring.buf, offset=offset)
+            target[...] = frame
+            del target
+
+        floor = min(self._min_threshold(), self.candidate_floor)
+        seq = self.next_seq
+        self.next_seq += 1
+        self.in_flight[seq] = slot
+        self.submit_times[seq] = time.perf_counter()
+        self.tasks.put((seq, self.ring.name, offset, frame.shape, self.input_size, floor))
+        return seq
+
+    def collect(self, timeout=None):
+        """
+        Wait for the oldest outstanding frame
+        Returns:
+            tuple: (seq, (boxes, confidences, class_ids)) with the decoded,
+            not yet filtered candidates
+        """
+        seq = self.next_result
+        if seq not in self.in_flight and seq not in self.finished:
+            raise RuntimeError("No frames in flight")
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while seq not in self.finished:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            self._receive(remaining)
+        self.next_result += 1
+        candidates, self.last_timings = self.finished.pop(seq)
+        self.last_submitted = self.submit_times.pop(seq)
+        if isinstance(candidates, Exception):
+            raise candidates
+        return seq, candidates
+
+    @property
+    def pending(self):
+        """Number of frames submitted but not collected yet"""
+        return self.next_seq - self.next_result
+
+    def detect(self, frame):
+        """
+        Run detection on a BGR frame in a worker process
+        Returns:
+            Detections: identical to ObjectDetector.detect()
+        """
+        if self.tiling is not None and self.tiling.applies(frame):
+            return self.detect_tiled(frame)
+            
+        self._drain()
+        self.submit(frame)
+        _, candidates = self.collect()
+        self.last_detected = (frame.copy(), candidates, None)
+        detections = self._filter(*candidates)
+        self.metrics.tick('inference')
+        return detections
+
+    def detect_batch(self, frames):
+        """
+        Run detection on several BGR frames spread over the workers
+        Returns:
+            list: one Detections per frame, in order
+        """
+        if self.tiling is not None:
+            return [self.detect(frame) for frame in frames]
+            
+        self._drain()
+        results = []
+        for frame in frames:
+            # Keep every slot busy but never wait on a slot we hold ourselves
+            while self.pending >= self.slots:
+                results.append(self._filter(*self.collect()[1]))
+                self.metrics.tick('inference')
+            self.submit(frame)
+        while self.pending:
+            results.append(self._filter(*self.collect()[1]))
+            self.metrics.tick('inference')
+        return results
+
+    def _tile_candidates(self, crops, floor):
+        """
+        Spread the tiles of a frame over the workers
+        Returns:
+            tuple: as for ObjectDetector._tile_candidates(), with each
+            tile's own forward time
+        """
+        self._drain()
+        first = self.next_seq
+        candidates = [None] * len(crops)
+        tiles = [None] * len(crops)
+        
+        def collect():
+            seq, result = self.collect()
+            forward_seconds, decode_seconds = self.last_timings
+            candidates[seq - first] = result
+            tiles[seq - first] = {'forward_ms': round(forward_seconds * 1000, 3),
+                                  'decode_ms': round(decode_seconds * 1000, 3)}
+            
+        for crop in crops:
+            while self.pending >= self.slots:
+                collect()
+            # submit() applies the same candidate floor
+            self.submit(crop)
+        while self.pending:
+            collect()
+        return candidates, {'tiles': tiles}
+        
+    def enable_quality_control(self, target_ms=None, target_fps=None, **controller_args):
+        """
+        As for ObjectDetector, fed with each frame's submit-to-result
+        latency. The worker pipeline detects every frame, so the operating
+        points only change the input size and NMS candidates.
+        """
+        from quality import default_levels
+        
+        if 'levels' not in controller_args:
+            levels = []
+            for input_size, _, max_candidates in default_levels(self.input_size):
+                if (input_size, 1, max_candidates) not in levels:
+                    levels.append((input_size, 1, max_candidates))
+            controller_args['levels'] = levels
+        super().enable_quality_control(target_ms=target_ms, target_fps=target_fps,
+                                       **controller_args)
+        
+    def start_pipeline(self, source=None):
+        """Run capture and inference on background threads, one frame per worker in flight"""
+        if source is None:
+            if self.cap is None or not self.cap.isOpened():
+                raise ValueError("Camera is not initialized")
+            source = self.cap
+
+        self.stop_pipeline()
+        self.pipeline = ParallelPipeline(self, source)
+        self.pipeline.start()
+
+    def finish_frame(self, frame, candidates):
+        """
+        Filter, track and draw the result of a frame that came back from
+        a worker
+        Returns:
+            tuple: (annotated_frame, detections)
+        """
+        from annotate import draw_detections
+
+        detections = self._filter(*candidates)
+        self.metrics.tick('inference')
+        if self.tracker is not None:
+            detections = self.tracker.update(detections)
+        self.last_detected = (frame.copy(), candidates, detections)
+        if self.recorder is not None:
+            self.recorder.record(detections, self.record_stream)
+        self.forwards_run += 1
+        self.last_detections = detections
+        with self.metrics.stage('draw'):
+            draw_detections(frame, detections)
+        if self.quality is not None:
+            self.quality.update((time.perf_counter() - self.last_submitted) * 1000)
+        return frame, detections.to_dicts()
+
+    def _drain(self):
+        """Discard results of frames submitted outside this call"""
+        while self.pending:
+            self.collect()
+
+    def _receive(self, timeout):
+        """Handle one message from the workers"""
+        kind, worker_id, seq, payload = self._get_result(timeout)
+        if kind == 'result':
+            candidates, timings = payload
+            if self.metrics.enabled:
+                self.metrics.record('forward', timings[0])
+                self.metrics.record('decode', timings[1])
+        elif kind == 'failed':
+            # Raised by collect() when this frame's turn comes
+            candidates, timings = RuntimeError(payload), None
+        else:
+            raise RuntimeError(payload)
+
+        self.free_slots.append(self.in_flight.pop(seq))
+        self.finished[seq] = (candidates, timings)
+
+    def _get_result(self, timeout=None):
+        """Read the result queue, noticing workers that died"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            wait = 0.5 if deadline is None else min(0.5, max(0.0, deadline - time.perf_counter()))
+            try:
+                return self.results.get(timeout=wait)
+            except queue.Empty:
+                dead = [p.name for p in self.processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Inference worker exited: {', '.join(dead)}")
+                if deadline is not None and time.perf_counter() >= deadline:
+                    raise TimeoutError("No result from the inference workers")
+
+    def _take_slot(self):
+        """Get a free ring slot, collecting results until one frees up"""
+        while not self.free_slots:
+            self._receive(None)
+        return self.free_slots.popleft()
+
+    def _resize_ring(self, nbytes):
+        """Replace the ring with one whose slots fit nbytes frames"""
+        while self.in_flight:
+            self._receive(None)
+        self._release_ring()
+        self.ring = shared_memory.SharedMemory(create=True, size=nbytes * self.slots)
+        self.slot_size = nbytes
+        self.free_slots = collections.deque(range(self.slots))
+
+    def _release_ring(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
+            self.slot_size = 0
+            self.free_slots = collections.deque()
+
+
+class ParallelPipeline(DetectionPipeline):
+    """
+    DetectionPipeline for a ParallelDetector: keeps one frame per worker in
+    flight and publishes results in capture order. Every frame is detected;
+    detect_interval and the motion gate are not used on this path.
+    """
+
+    def _inference_loop(self):
+        detector = self.detector
+        waiting = collections.deque()
+        while True:
+            # Keep every worker busy with the newest frames
+            try:
+                while len(waiting) < detector.workers:
+                    timeout = 0.1 if not waiting else 0.0
+                    captured_at, frame = self.frames.get(timeout=timeout)
+                    detector.submit(frame)
+                    waiting.append((captured_at, frame))
+            except queue.Empty:
+                pass
+
+            if not waiting:
+                if self.stop_event.is_set():
+                    break
+                continue
+
+            try:
+                _, candidates = detector.collect()
+                captured_at, frame = waiting.popleft()
+                frame, detections = detector.finish_frame(frame, candidates)
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                self.error = e
+                break
+
+            with self.lock:
+                self.seq += 1
+                self.latest = (self.seq, frame, detections)
+            self.frames_processed += 1
+            self.last_latency = time.perf_counter() - captured_at
+
+        self.stop_event.set()
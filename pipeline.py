@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class SyntheticFrameSource:
+    def __init__(self, width=640, height=480, fps=None, num_frames=None, seed=0):
+        """
+        Frame source that mimics cv2.VideoCapture.read() with generated frames
+        Args:
+            width, height: frame size in pixels
+            fps: pace reads to this rate, or None to return frames immediately
+            num_frames: stop after this many frames, or None for an endless feed
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.num_frames = num_frames
+        self.frames_read = 0
+        self._rng = np.random.default_rng(seed)
+        self._next_time = None
+
+    def isOpened(self):
+        """Report whether more frames are available"""
+        return self.num_frames is None or self.frames_read < self.num_frames
+
+    def read(self):
+        """Return (ret, frame) like cv2.VideoCapture.read()"""
+        if not self.isOpened():
+            return False, None
+
+        if self.fps:
+            now = time.perf_counter()
+            if self._next_time is not None and now < self._next_time:
+                time.sleep(self._next_time - now)
+            self._next_time = max(now, self._next_time or now) + 1.0 / self.fps
+
+        frame = self._rng.integers(0, 256, (self.height, self.width, 3), dtype=np.uint8)
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        """Stop producing frames"""
+        self.num_frames = self.frames_read
+
+
+class DetectionPipeline:
+    def __init__(self, detector, source):
+        """
+        Capture -> inference pipeline that always works on the newest frame
+        Args:
+            detector: ObjectDetector providing read_frame() and process_frame()
+            source: object with a cv2.VideoCapture-style read() method
+        """
+        self.detector = detector
+        self.source = source
+
+        # Single-slot queue between capture and inference: a new frame
+        # replaces whatever the worker has not picked up yet
+        self.frames = queue.Queue(maxsize=1)
+
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.latest = None
+        self.seq = 0
+        self.error = None
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.last_latency = None
+
+        self.capture_thread = threading.Thread(
+            target=self._capture_loop, name="capture", daemon=True
+        )
+        self.inference_thread = threading.Thread(
+            target=self._inference_loop, name="inference", daemon=True
+        )
+
+    def start(self):
+        """Start the capture and inference threads"""
+        self.capture_thread.start()
+        self.inference_thread.start()
+
+    def stop(self, timeout=2.0):
+        """Signal both threads to finish and wait for them"""
+        self.stop_event.set()
+        for thread in (self.capture_thread, self.inference_thread):
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout)
+
+    @property
+    def running(self):
+        """True while the pipeline still produces results"""
+        return self.inference_thread.is_alive() and self.error is None
+
+    def get_latest(self):
+        """
+        Get the newest processed frame
+        Returns:
+            tuple: (seq, processed_frame, detections) or None
+        """
+        with self.lock:
+            return self.latest
+
+    def _capture_loop(self):
+        """Keep reading frames, replacing any frame not yet consumed"""
+        while not self.stop_event.is_set():
+            try:
+                frame = self.detector.read_frame(self.source)
+            except Exception as e:
+                self.error = e
+                break
+
+            if frame is None:
+                self.error = ValueError("Failed to capture frame")
+                break
+
+            self.frames_captured += 1
+            item = (time.perf_counter(), frame)
+            try:
+                self.frames.put_nowait(item)
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+                self.frames.put_nowait(item)
+
+        self.stop_event.set()
+
+    def _inference_loop(self):
+        """Run detection on the newest frame and publish the result"""
+        while True:
+            try:
+                captured_at, frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    break
+                continue
+
+            try:
+                frame, detections = self.detector.process_frame(frame)
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                self.error = e
+                break
+
+            with self.lock:
+                self.seq += 1
+                self.latest = (self.seq, frame, detections)
+            self.frames_processed += 1
+            self.last_latency = time.perf_counter() - captured_at
+
+        self.stop_event.set()
@@ -0,0 +1,109 @@
+from collections import deque
+
+import numpy as np
+
+
+def default_levels(input_size):
+    """
+    Operating points from best quality to cheapest, starting at input_size
+    Returns:
+        list: (input_size, detect_interval, max_candidates) tuples
+    """
+    sizes = [s for s in (608, 416, 320, 256) if s <= input_size] or [input_size]
+    if sizes[0] != input_size:
+        sizes.insert(0, input_size)
+    levels = [(sizes[0], 1, None), (sizes[0], 1, 1000)]
+    for size in sizes[1:]:
+        levels.append((size, 1, 1000))
+    smallest = sizes[-1]
+    levels += [(smallest, 2, 500), (smallest, 3, 300), (smallest, 4, 200)]
+    return levels
+
+
+class QualityController:
+    def __init__(self, detector, target_ms=None, target_fps=None, levels=None, window=30,
+                 cooldown=15, headroom=0.6):
+        """
+        Trade detection quality for a steady per-frame latency
+        Args:
+            detector: ObjectDetector whose input_size, detect_interval and
+                max_candidates are adjusted
+            target_ms: budget for the average processed-frame latency
+            target_fps: alternatively, the frame rate to hold
+            levels: (input_size, detect_interval, max_candidates) operating
+                points ordered from best to cheapest, default_levels() by default
+            window: number of recent frames the latency is averaged over
+            cooldown: frames to wait after a change before the next one
+            headroom: step back up once latency is below this fraction of
+                the budget
+        """
+        if target_ms is None and target_fps is None:
+            raise ValueError("Either target_ms or target_fps is required")
+        self.detector = detector
+        self.budget_ms = target_ms if target_ms is not None else 1000.0 / target_fps
+        self.levels = levels or default_levels(detector.input_size)
+        self.latencies = deque(maxlen=window)
+        self.cooldown = cooldown
+        self.headroom = headroom
+        # Frame skip set up before the controller took over is the minimum
+        self.base_interval = detector.detect_interval if detector.tracker is not None else 1
+        self.level = 0
+        self.changes = 0
+        # Average of the window, kept as a plain float so other threads can
+        # read it while frames are being recorded
+        self.latency_ms = None
+        self.apply(0)
+
+    def update(self, latency_ms):
+        """
+        Record the latency of one processed frame and change the operating
+        point if the budget is missed or there is room to spare
+        Returns:
+            bool: True if the operating point changed
+        """
+        self.latencies.append(latency_ms)
+        latency = self.latency_ms = float(np.mean(self.latencies))
+        if len(self.latencies) < self.cooldown:
+            return False
+
+        if latency > self.budget_ms and self.level < len(self.levels) - 1:
+            self.apply(self.level + 1)
+            return True
+        if latency < self.budget_ms * self.headroom and self.level > 0:
+            self.apply(self.level - 1)
+            return True
+        return False
+
+    def apply(self, level):
+        """Switch the detector to an operating point"""
+        input_size, detect_interval, max_candidates = self.levels[level]
+        detect_interval = max(detect_interval, self.base_interval)
+        detector = self.detector
+        detector.input_size = input_size
+        detector.max_candidates = max_candidates
+        if detect_interval > 1 and detector.tracker is None:
+            detector.enable_tracking(detect_interval=detect_interval)
+        elif detector.tracker is not None:
+            detector.detect_interval = detect_interval
+        if level != self.level:
+            self.changes += 1
+        self.level = level
+        # Latencies measured at the old operating point no longer apply
+        self.latencies.clear()
+
+    @property
+    def operating_point(self):
+        """Current settings and measurements as a dict"""
+        input_size, detect_interval, max_candidates = self.levels[self.level]
+        detect_interval = max(detect_interval, self.base_interval)
+        latency = self.latency_ms
+        return {
+            'level': self.level,
+            'levels': len(self.levels),
+            'input_size': input_size,
+            'detect_interval': detect_interval,
+            'max_candidates': max_candidates,
+            'budget_ms': round(self.budget_ms, 3),
+            'latency_ms': None if latency is None else round(latency, 3),
+            'changes': self.changes,
+        }
@@ -0,0 +1,410 @@
+"""
+Append-only binary log of detections with a time/class block index
+
+    recorder = DetectionRecorder('detections.log', detector.classes)
+    recorder.record(detections, stream='door')
+    ...
+    log = DetectionLog('detections.log')
+    people = log.query(start, end, classes=['person'])
+
+A log is a directory holding
+    records.bin  fixed-size RECORD_DTYPE rows, one per detection
+    index.bin    one INDEX_DTYPE entry per block of block_rows records with
+                 its time range and a bitmap of the classes seen in it
+    meta.json    class names, stream names and the block size
+Readers map records.bin with numpy.memmap and only touch the blocks the
+index says can match. Export to CSV with
+    python -m recorder detections.log -o people.csv --class person
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),   # seconds since the epoch
+    ('stream', '<u2'),      # index into meta.json 'streams'
+    ('class_id', '<i2'),
+    ('score', '<f4'),
+    ('box', '<i4', (4,)),   # x1, y1, x2, y2 in frame pixels
+    ('track_id', '<i4'),    # -1 when untracked
+])
+
+RECORDS_FILE = 'records.bin'
+INDEX_FILE = 'index.bin'
+META_FILE = 'meta.json'
+
+
+def index_dtype(num_classes):
+    """Index entry: time range of a block and a bitmap of its class ids"""
+    return np.dtype([
+        ('t_min', '<f8'),
+        ('t_max', '<f8'),
+        ('classes', 'u1', (max(1, (num_classes + 7) // 8),)),
+    ])
+
+
+def block_entry(records, dtype):
+    """Index entry for one block of records"""
+    entry = np.zeros(1, dtype=dtype)
+    entry['t_min'] = records['timestamp'].min()
+    entry['t_max'] = records['timestamp'].max()
+    seen = np.zeros(dtype['classes'].shape[0] * 8, dtype=bool)
+    seen[records['class_id']] = True
+    entry['classes'] = np.packbits(seen, bitorder='little')
+    return entry
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+
+def write_meta(path, meta):
+    """Replace meta.json atomically so readers never see it half written"""
+    meta_path = os.path.join(path, META_FILE)
+    part_path = meta_path + '.part'
+    with open(part_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(part_path, meta_path)
+
+
+def _truncate_to(path, itemsize):
+    """Cut a torn record left by a crash; returns the number of whole records"""
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if size % itemsize:
+        with open(path, 'r+b') as f:
+            f.truncate(size - size % itemsize)
+    return size // itemsize
+
+
+class DetectionRecorder:
+    def __init__(self, path, classes, block_rows=4096, flush_interval=0.5, max_queue=1024):
+        """
+        Append detections to a log from a background writer thread.
+        Only one recorder may write to a log at a time; reopening an
+        existing log appends to it.
+        Args:
+            path: log directory, created if missing
+            classes: class names of the detector, must match an existing log
+            block_rows: records per index block
+            flush_interval: longest time records wait before being written
+            max_queue: frames waiting for the writer beyond this are dropped
+                and counted in frames_dropped
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            self.meta = read_meta(path)
+            if self.meta['classes'] != list(classes):
+                raise ValueError(f"{path} was recorded with different classes")
+        else:
+            self.meta = {'version': 1, 'block_rows': block_rows,
+                         'classes': list(classes), 'streams': []}
+            write_meta(path, self.meta)
+        self.block_rows = self.meta['block_rows']
+        self.index_dtype = index_dtype(len(self.meta['classes']))
+        self.stream_ids = {name: i for i, name in enumerate(self.meta['streams'])}
+        self.stream_lock = threading.Lock()
+
+        records_path = os.path.join(path, RECORDS_FILE)
+        index_path = os.path.join(path, INDEX_FILE)
+        self.rows = _truncate_to(records_path, RECORD_DTYPE.itemsize)
+        self.records_file = open(records_path, 'ab')
+        self.index_file = open(index_path, 'ab')
+        self._repair_index(records_path, index_path)
+
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.frames_dropped = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._write_loop, name="recorder", daemon=True)
+        self.thread.start()
+
+    def record(self, detections, stream='default', timestamp=None):
+        """
+        Queue the detections of one frame; returns without touching the disk
+        Args:
+            detections: Detections of the frame
+            stream: name of the camera or source the frame came from
+            timestamp: frame time in seconds since the epoch, now by default
+        """
+        if self.closed:
+            raise RuntimeError("DetectionRecorder is closed")
+        count = len(detections)
+        if count == 0:
+            return
+        records = np.empty(count, dtype=RECORD_DTYPE)
+        records['timestamp'] = time.time() if timestamp is None else timestamp
+        records['stream'] = self._stream_id(stream)
+        records['class_id'] = detections.class_ids
+        records['score'] = detections.scores
+        records['box'] = detections.boxes
+        records['track_id'] = -1 if detections.track_ids is None else detections.track_ids
+        try:
+            self.queue.put_nowait(records)
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def close(self):
+        """Write everything queued so far and close the files"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        self.records_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _stream_id(self, name):
+        stream_id = self.stream_ids.get(name)
+        if stream_id is None:
+            with self.stream_lock:
+                stream_id = self.stream_ids.get(name)
+                if stream_id is None:
+                    # Readers must know the name before any of its records land
+                    self.meta['streams'].append(name)
+                    write_meta(self.path, self.meta)
+                    stream_id = self.stream_ids[name] = len(self.meta['streams']) - 1
+        return stream_id
+
+    def _repair_index(self, records_path, index_path):
+        """Bring the index in line with the records after a crash"""
+        entries = _truncate_to(index_path, self.index_dtype.itemsize)
+        blocks = self.rows // self.block_rows
+        if entries > blocks:
+            self.index_file.truncate(blocks * self.index_dtype.itemsize)
+            entries = blocks
+        for block in range(entries, blocks):
+            self.index_file.write(block_entry(self._read_rows(records_path, block), self.index_dtype))
+        self.index_file.flush()
+
+        # Aggregates of the unfinished last block
+        self.block = None
+        if self.rows % self.block_rows:
+            self.block = block_entry(self._read_rows(records_path, blocks), self.index_dtype)
+
+    def _read_rows(self, records_path, block):
+        return np.fromfile(records_path, dtype=RECORD_DTYPE, count=self.block_rows,
+                           offset=block * self.block_rows * RECORD_DTYPE.itemsize)
+
+    def _write_loop(self):
+        """Gather queued frames and append them in one write"""
+        done = False
+        while not done:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch:
+                try:
+                    self._append(np.concatenate(batch))
+                except OSError as e:
+                    print(f"Error writing detection log: {e}")
+
+    def _append(self, records):
+        """Write records, then index entries for the blocks they complete"""
+        self.records_file.write(records.tobytes())
+        self.records_file.flush()
+
+        # The index only ever points at records already on disk
+        start = 0
+        while start < len(records):
+            room = self.block_rows - self.rows % self.block_rows
+            chunk = records[start:start + room]
+            entry = block_entry(chunk, self.index_dtype)
+            if self.block is not None:
+                entry['t_min'] = min(entry['t_min'][0], self.block['t_min'][0])
+                entry['t_max'] = max(entry['t_max'][0], self.block['t_max'][0])
+                entry['classes'] |= self.block['classes']
+            self.rows += len(chunk)
+            start += len(chunk)
+            if self.rows % self.block_rows:
+                self.block = entry
+            else:
+                self.index_file.write(entry.tobytes())
+                self.block = None
+        self.index_file.flush()
+
+
+class DetectionLog:
+    def __init__(self, path):
+        """
+        Read-only view of a detection log. Records written after opening
+        are not visible; open the log again to see them.
+        Args:
+            path: log directory written by DetectionRecorder
+        """
+        self.path = path
+        meta = read_meta(path)
+        self.classes = meta['classes']
+        self.streams = meta['streams']
+        self.block_rows = meta['block_rows']
+
+        records_path = os.path.join(path, RECORDS_FILE)
+        rows = os.path.getsize(records_path) // RECORD_DTYPE.itemsize
+        if rows:
+            # Zero-copy view; columns are fields, e.g. records['timestamp']
+            self.records = np.memmap(records_path, dtype=RECORD_DTYPE, mode='r', shape=(rows,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+        dtype = index_dtype(len(self.classes))
+        index_path = os.path.join(path, INDEX_FILE)
+        entries = min(os.path.getsize(index_path) // dtype.itemsize, rows // self.block_rows)
+        self.index = np.fromfile(index_path, dtype=dtype, count=entries)
+
+    def __len__(self):
+        return len(self.records)
+
+    def class_ids(self, classes):
+        """Class names or ids as an array of ids"""
+        ids = []
+        for c in classes:
+            if isinstance(c, str):
+                if c not in self.classes:
+                    raise ValueError(f"Unknown class {c!r}")
+                c = self.classes.index(c)
+            ids.append(int(c))
+        return np.array(ids, dtype=np.int64)
+
+    def query(self, start=None, end=None, classes=None, streams=None):
+        """
+        Find detections without reading blocks that cannot match
+        Args:
+            start, end: time range in seconds since the epoch, start
+                inclusive and end exclusive; None for open-ended
+            classes: class names or ids to keep, None for all
+            streams: stream names to keep, None for all
+        Returns:
+            ndarray: matching RECORD_DTYPE rows (a copy), in log order
+        """
+        class_ids = None if classes is None else self.class_ids(classes)
+        stream_ids = None
+        if streams is not None:
+            stream_ids = [self.streams.index(s) for s in streams if s in self.streams]
+
+        # Blocks whose time range and class bitmap may match
+        candidates = np.ones(len(self.index), dtype=bool)
+        if start is not None:
+            candidates &= self.index['t_max'] >= start
+        if end is not None:
+            candidates &= self.index['t_min'] < end
+        if class_ids is not None:
+            bits = np.unpackbits(self.index['classes'], axis=1, bitorder='little')
+            candidates &= bits[:, class_ids].any(axis=1)
+
+        # Runs of consecutive blocks, then the unindexed tail
+        ranges = []
+        for block in np.flatnonzero(candidates).tolist():
+            lo, hi = block * self.block_rows, (block + 1) * self.block_rows
+            if ranges and ranges[-1][1] == lo:
+                ranges[-1][1] = hi
+            else:
+                ranges.append([lo, hi])
+        tail = len(self.index) * self.block_rows
+        if tail < len(self.records):
+            ranges.append([tail, len(self.records)])
+
+        parts = []
+        for lo, hi in ranges:
+            chunk = self.records[lo:hi]
+            mask = np.ones(len(chunk), dtype=bool)
+            if start is not None:
+                mask &= chunk['timestamp'] >= start
+            if end is not None:
+                mask &= chunk['timestamp'] < end
+            if class_ids is not None:
+                mask &= np.isin(chunk['class_id'], class_ids)
+            if stream_ids is not None:
+                mask &= np.isin(chunk['stream'], stream_ids)
+            parts.append(np.asarray(chunk[mask]))
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
+
+    def export_csv(self, out, records=None):
+        """
+        Write records as CSV, one row per detection
+        Args:
+            out: text file object
+            records: rows from query(), the whole log by default
+        Returns:
+            int: number of rows written
+        """
+        if records is None:
+            records = self.records
+        writer = csv.writer(out)
+        writer.writerow(['timestamp', 'stream', 'class', 'confidence',
+                         'x1', 'y1', 'x2', 'y2', 'track_id'])
+        # Convert in blocks so exporting a huge log does not load all of it
+        for lo in range(0, len(records), self.block_rows):
+            chunk = records[lo:lo + self.block_rows]
+            for (t, stream, class_id, score, (x1, y1, x2, y2), track_id) in chunk.tolist():
+                writer.writerow([f"{t:.6f}", self.streams[stream], self.classes[class_id],
+                                 f"{score:.6f}", x1, y1, x2, y2,
+                                 '' if track_id < 0 else track_id])
+        return len(records)
+
+
+def parse_time(value):
+    """Seconds since the epoch from a number or an ISO 8601 date/time"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m recorder',
+        description='Query a detection log and export the matches as CSV'
+    )
+    parser.add_argument('log', help='log directory')
+    parser.add_argument('-o', '--output', default='-', help='CSV file (default: stdout)')
+    parser.add_argument('--start', type=parse_time,
+                        help='earliest time, epoch seconds or ISO 8601')
+    parser.add_argument('--end', type=parse_time, help='latest time (exclusive)')
+    parser.add_argument('--class', dest='classes', action='append',
+                        help='class name to keep, may be repeated')
+    parser.add_argument('--stream', dest='streams', action='append',
+                        help='stream name to keep, may be repeated')
+    args = parser.parse_args(argv)
+
+    log = DetectionLog(args.log)
+    try:
+        records = log.query(args.start, args.end, args.classes, args.streams)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.output == '-':
+        count = log.export_csv(sys.stdout, records)
+    else:
+        with open(args.output, 'w', newline='') as f:
+            count = log.export_csv(f, records)
+    print(f"Exported {count} of {len(log)} detections", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""
+HTTP inference server with dynamic batching
+
+    python -m server --port 8000
+    curl --data-binary @photo.jpg http://127.0.0.1:8000/detect
+
+POST /detect takes an encoded image (JPEG, PNG, ...) as the request body
+and returns its detections as JSON. Requests arriving together are
+collected into one batch, up to --max-batch-size images or --max-wait-ms
+after the first one, and run as a single forward pass. GET /metrics
+reports queue depth, batch sizes and stage timings; GET /health returns
+{"ok": true} once the model is loaded.
+"""
+import argparse
+import collections
+import contextlib
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from detector import ObjectDetector
+from metrics import Metrics
+from models import MODELS
+
+
+class QueueFull(Exception):
+    """Raised when the batcher cannot take more requests"""
+
+
+class DynamicBatcher:
+    def __init__(self, detector, max_batch_size=8, max_wait_ms=10.0, max_queue=256,
+                 metrics=None):
+        """
+        Group concurrent detection requests into batches for one forward pass
+        Args:
+            detector: loaded ObjectDetector (or ParallelDetector)
+            max_batch_size: most frames per forward pass, 1 disables batching
+            max_wait_ms: how long the first request of a batch may wait for
+                others to join it
+            max_queue: requests waiting beyond this are rejected with QueueFull
+            metrics: Metrics receiving 'queue_wait' and 'batch' timings
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.batch_sizes = collections.deque(maxlen=self.metrics.window)
+        self.stop_event = threading.Event()
+
+        self.requests_total = 0
+        self.rejected = 0
+        self.batches = 0
+        self.thread = threading.Thread(target=self._batch_loop, name="batcher", daemon=True)
+
+    def start(self):
+        """Start the batching thread"""
+        self.thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop the batching thread after the batch in progress"""
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def submit(self, frame):
+        """
+        Queue a BGR frame for detection
+        Returns:
+            Future: resolves to (detections, batch_size, queue_seconds)
+        """
+        future = Future()
+        try:
+            self.requests.put_nowait((time.perf_counter(), frame, future))
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFull(f"More than {self.max_queue} requests waiting")
+        self.requests_total += 1
+        return future
+
+    @property
+    def queue_depth(self):
+        """Requests waiting for a batch"""
+        return self.requests.qsize()
+
+    def stats(self):
+        """
+        Queue and batch figures plus the metrics snapshot
+        Returns:
+            dict: queue_depth, request/batch counters, batch size summary
+            over the recent window, stage timings and rates
+        """
+        sizes = np.array(list(self.batch_sizes))
+        summary = {}
+        if len(sizes):
+            summary = {
+                'mean': round(float(sizes.mean()), 2),
+                'p50': int(np.percentile(sizes, 50)),
+                'max': int(sizes.max()),
+                'histogram': {str(size): int(count) for size, count in
+                              zip(*np.unique(sizes, return_counts=True))},
+            }
+        snapshot = self.metrics.snapshot()
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue': self.max_queue,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'requests': self.requests_total,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'batch_size': summary,
+            'stages': snapshot['stages'],
+            'fps': snapshot['fps'],
+        }
+
+    def _next_batch(self):
+        """Block for a first request, then gather more until the batch is full or the wait is over"""
+        try:
+            batch = [self.requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = batch[0][0] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self.requests.get(timeout=remaining))
+                else:
+                    # Whatever is already queued still joins
+                    batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _batch_loop(self):
+        """Run batches and resolve their requests' futures"""
+        while not self.stop_event.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for queued_at, _, _ in batch:
+                self.metrics.record('queue_wait', started - queued_at)
+            try:
+                with self.metrics.stage('batch'):
+                    results = self.detector.detect_batch([frame for _, frame, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+            self.metrics.tick('batches')
+            for (queued_at, _, future), detections in zip(batch, results):
+                self.metrics.tick('requests')
+                future.set_result((detections, len(batch), started - queued_at))
+
+
+class DetectionHandler(BaseHTTPRequestHandler):
+    """Request handler; the server carries the batcher and limits"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'ok': True})
+        elif self.path == '/metrics':
+            self._send_json(200, self.server.batcher.stats())
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/detect':
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            # Without a usable length the body cannot be skipped either
+            self.close_connection = True
+            self._send_json(400, {'error': 'invalid Content-Length'})
+            return
+        if length <= 0:
+            self._send_json(400, {'error': 'empty request body'})
+            return
+        if length > self.server.max_body:
+            self.close_connection = True
+            self._send_json(413, {'error': f"image larger than {self.server.max_body} bytes"})
+            return
+        body = self.rfile.read(length)
+
+        frame = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            self._send_json(400, {'error': 'could not decode image'})
+            return
+
+        try:
+            future = self.server.batcher.submit(frame)
+        except QueueFull as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        try:
+            detections, batch_size, queue_seconds = future.result(self.server.timeout_seconds)
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        (H, W) = frame.shape[:2]
+        self._send_json(200, {
+            'width': W,
+            'height': H,
+            'detections': detections.to_dicts(),
+            'batch_size': batch_size,
+            'queue_ms': round(queue_seconds * 1000, 3),
+        })
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class DetectionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, batcher, max_body=20 << 20, timeout_seconds=30.0,
+                 verbose=False):
+        """
+        Threaded HTTP server handing decoded images to a DynamicBatcher
+        Args:
+            address: (host, port), port 0 picks a free one
+            max_body: largest accepted request body in bytes
+            timeout_seconds: give up on a request after this long
+            verbose: log every request to stderr
+        """
+        super().__init__(address, DetectionHandler)
+        self.batcher = batcher
+        self.max_body = max_body
+        self.timeout_seconds = timeout_seconds
+        self.verbose = verbose
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m server',
+        description='Serve object detection over HTTP with dynamic batching'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=8,
+                        help='most images per forward pass, 1 to disable batching (default: 8)')
+    parser.add_argument('--max-wait-ms', type=float, default=10.0,
+                        help='how long a request may wait for a batch to fill (default: 10)')
+    parser.add_argument('--max-queue', type=int, default=256,
+                        help='reject requests beyond this many waiting (default: 256)')
+    parser.add_argument('--conf', type=float, default=0.5,
+                        help='confidence threshold (default: 0.5)')
+    parser.add_argument('--model', default='yolov3', choices=sorted(MODELS),
+                        help='registered model to use (default: yolov3)')
+    parser.add_argument('--input-size', type=int,
+                        help="network input size, a multiple of 32 (default: the model's)")
+    parser.add_argument('--config', help='Darknet cfg file to use instead of --model')
+    parser.add_argument('--weights', help='Darknet weights file to use instead of --model')
+    parser.add_argument('--workers', type=int,
+                        help='run the network in this many worker processes')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+    if bool(args.config) != bool(args.weights):
+        parser.error('--config and --weights must be given together')
+
+    with contextlib.redirect_stdout(sys.stderr):
+        model_args = dict(config_path=args.config, weights_path=args.weights,
+                          model=args.model, input_size=args.input_size)
+        if args.workers:
+            from parallel import ParallelDetector
+
+            detector = ParallelDetector(workers=args.workers, **model_args)
+        else:
+            detector = ObjectDetector(**model_args)
+    detector.set_confidence_threshold(args.conf)
+
+    batcher = DynamicBatcher(detector, args.max_batch_size, args.max_wait_ms, args.max_queue)
+    batcher.start()
+    server = DetectionServer((args.host, args.port), batcher, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port} (batch size {batcher.max_batch_size}, "
+          f"wait {args.max_wait_ms} ms)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+        detector.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+import os
+import threading
+import time
+
+import cv2
+
+from annotate import draw_detections
+from metrics import Metrics
+
+
+def open_capture(source):
+    """
+    Open a capture source
+    Args:
+        source: camera index (int or digit string), video file path or URL
+    Returns:
+        cv2.VideoCapture
+    """
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        capture.release()
+        raise ValueError(f"Could not open video source {source!r}")
+    return capture
+
+
+class Stream:
+    def __init__(self, manager, name, source, fps=None, mirror=False, loop=False,
+                 window=60):
+        """
+        One capture source of a StreamManager with its own capture thread
+        and latest-frame slot
+        Args:
+            name: label used in stats and the UI
+            source: camera index, video file or URL, or an already opened
+                object with a cv2.VideoCapture-style read()
+            fps: pace reads to this rate; None paces video files at their
+                own frame rate and reads cameras and URLs as frames arrive
+            mirror: flip frames horizontally, like the single-camera view
+            loop: restart video files at the end instead of finishing
+            window: frames the FPS and latency figures are averaged over
+        """
+        self.manager = manager
+        self.name = name
+        self.source = source
+        self.fps = fps
+        self.mirror = mirror
+        self.loop = loop
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.capture = None
+        self.metrics = Metrics(window=window)
+        self.tracker = None
+
+        # Guarded by manager.condition
+        self.pending = None
+        self.latest = None
+        self.seq = 0
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.last_latency = None
+        self.finished = False
+        self.error = None
+        self.thread = threading.Thread(target=self._capture_loop,
+                                       name=f"capture-{name}", daemon=True)
+
+    def open(self):
+        """Open the capture source unless it was passed in already open"""
+        if hasattr(self.source, 'read'):
+            self.capture = self.source
+        else:
+            self.capture = open_capture(self.source)
+        if self.fps is None and self.is_file:
+            rate = self.capture.get(cv2.CAP_PROP_FPS)
+            self.fps = rate if rate and rate > 0 else None
+
+    def release(self):
+        """Close the capture source"""
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    @property
+    def running(self):
+        """True while the stream still delivers frames"""
+        return self.thread.is_alive() and self.error is None
+
+    def _capture_loop(self):
+        """Keep reading frames, replacing any frame not yet picked up for inference"""
+        manager = self.manager
+        next_time = None
+        while not manager.stop_event.is_set():
+            try:
+                ret, frame = self.capture.read()
+                if (not ret or frame is None) and self.is_file and self.loop:
+                    self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = self.capture.read()
+            except Exception as e:
+                self.error = e
+                break
+
+            if not ret or frame is None:
+                if not self.is_file:
+                    self.error = ValueError(f"Failed to capture frame from {self.name}")
+                self.finished = True
+                break
+
+            if self.mirror:
+                frame = cv2.flip(frame, 1)
+
+            if self.fps:
+                now = time.perf_counter()
+                if next_time is not None and now < next_time:
+                    time.sleep(next_time - now)
+                next_time = max(now, next_time or now) + 1.0 / self.fps
+
+            with manager.condition:
+                if self.pending is not None:
+                    self.frames_dropped += 1
+                self.pending = (time.perf_counter(), frame)
+                self.frames_captured += 1
+                manager.condition.notify()
+            self.metrics.tick('capture')
+
+        with manager.condition:
+            manager.condition.notify()
+
+    def _publish(self, frame, detections, captured_at):
+        """Annotate and store an inference result; called on the inference thread"""
+        if self.tracker is not None:
+            detections = self.tracker.update(detections)
+        recorder = self.manager.detector.recorder
+        if recorder is not None:
+            recorder.record(detections, self.name)
+        draw_detections(frame, detections)
+        dicts = detections.to_dicts()
+
+        latency = time.perf_counter() - captured_at
+        with self.manager.condition:
+            self.seq += 1
+            self.latest = (self.seq, frame, dicts)
+            self.frames_processed += 1
+            self.last_latency = latency
+        self.metrics.record('latency', latency)
+        self.metrics.tick('processed')
+
+    def stats(self):
+        """
+        Counters and rates of this stream
+        Returns:
+            dict: captured/dropped/processed counts, capture and processed
+            FPS, median capture-to-result latency and state
+        """
+        snapshot = self.metrics.snapshot()
+        latency = snapshot['stages'].get('latency')
+        return {
+            'source': self.source if isinstance(self.source, (int, str)) else repr(self.source),
+            'running': self.running,
+            'finished': self.finished,
+            'captured': self.frames_captured,
+            'dropped': self.frames_dropped,
+            'processed': self.frames_processed,
+            'capture_fps': snapshot['fps'].get('capture', 0.0),
+            'fps': snapshot['fps'].get('processed', 0.0),
+            'latency_ms': None if latency is None else latency['p50_ms'],
+            'error': None if self.error is None else str(self.error),
+        }
+
+
+class StreamManager:
+    def __init__(self, detector, batch_size=1, track=False):
+        """
+        Run several capture sources through one shared ObjectDetector.
+        Every stream has its own capture thread and keeps only its newest
+        frame; a single inference thread serves the streams round-robin so
+        a fast camera cannot starve a slow one.
+        Args:
+            detector: loaded ObjectDetector shared by all streams
+            batch_size: frames from different streams that may go through
+                one forward pass together
+            track: give every stream its own tracker so track ids are
+                stable per stream
+        """
+        self.detector = detector
+        self.batch_size = max(1, int(batch_size))
+        self.track = track
+        self.streams = {}
+        self.order = []
+        self.next_index = 0
+
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.error = None
+        self.batches_run = 0
+        self.inference_thread = threading.Thread(target=self._inference_loop,
+                                                 name="stream-inference", daemon=True)
+
+    def add_stream(self, source, name=None, **stream_args):
+        """
+        Register a capture source before start()
+        Args:
+            source: camera index, video file path, URL or capture object
+            name: unique label, stream<N> by default
+            stream_args: passed on to Stream (fps, mirror, loop, window)
+        Returns:
+            Stream
+        """
+        if self.inference_thread.is_alive():
+            raise RuntimeError("Streams must be added before start()")
+        name = name or f"stream{len(self.order)}"
+        if name in self.streams:
+            raise ValueError(f"Duplicate stream name {name!r}")
+        stream = Stream(self, name, source, **stream_args)
+        if self.track:
+            from tracker import Tracker
+
+            stream.tracker = Tracker()
+        self.streams[name] = stream
+        self.order.append(stream)
+        return stream
+
+    def start(self):
+        """Open every source and start the capture and inference threads"""
+        try:
+            for stream in self.order:
+                stream.open()
+        except Exception:
+            for stream in self.order:
+                stream.release()
+            raise
+        for stream in self.order:
+            stream.thread.start()
+        self.inference_thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop all threads and release the capture sources"""
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        for stream in self.order:
+            if stream.thread.is_alive():
+                stream.thread.join(timeout)
+        if self.inference_thread.is_alive():
+            self.inference_thread.join(timeout)
+        for stream in self.order:
+            stream.release()
+
+    @property
+    def running(self):
+        """True until every stream has ended and its last frame was processed"""
+        return self.inference_thread.is_alive() and self.error is None
+
+    def get_latest(self, name):
+        """
+        Get the newest processed frame of a stream
+        Returns:
+            tuple: (seq, processed_frame, detections) or None
+        """
+        with self.condition:
+            return self.streams[name].latest
+
+    def stats(self):
+        """
+        Per-stream counters and rates
+        Returns:
+            dict: stream name -> Stream.stats()
+        """
+        return {stream.name: stream.stats() for stream in self.order}
+
+    def _next_batch(self):
+        """Take pending frames round-robin, at most one per stream; needs condition held"""
+        batch = []
+        count = len(self.order)
+        for k in range(count):
+            index = (self.next_index + k) % count
+            stream = self.order[index]
+            if stream.pending is None:
+                continue
+            captured_at, frame = stream.pending
+            stream.pending = None
+            batch.append((stream, captured_at, frame))
+            # The next batch starts after the last stream served
+            self.next_index = (index + 1) % count
+            if len(batch) == self.batch_size:
+                break
+        return batch
+
+    def _inference_loop(self):
+        """Run detection for the streams in turn and publish the results"""
+        while True:
+            with self.condition:
+                batch = self._next_batch()
+                while not batch and not self.stop_event.is_set():
+                    if not any(stream.thread.is_alive() for stream in self.order):
+                        break
+                    self.condition.wait(0.1)
+                    batch = self._next_batch()
+            if not batch:
+                break
+
+            frames = [frame for _, _, frame in batch]
+            try:
+                if len(frames) == 1:
+                    results = [self.detector.detect(frames[0])]
+                else:
+                    results = self.detector.detect_batch(frames)
+                self.batches_run += 1
+                for (stream, captured_at, frame), detections in zip(batch, results):
+                    stream._publish(frame, detections, captured_at)
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                self.error = e
+                break
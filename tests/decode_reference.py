@@ -0,0 +1,49 @@
+"""
+Reference YOLO output decoding and synthetic output tensors, shared by
+tests/test_decode.py and benchmarks/bench_decode.py
+"""
+import numpy as np
+
+
+def loop_decode(outputs, W, H, conf_threshold):
+    """Reference implementation: the original per-row decode loop"""
+    boxes = []
+    confidences = []
+    class_ids = []
+
+    for output in outputs:
+        for detection in output:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+
+            if confidence > conf_threshold:
+                box = detection[0:4] * np.array([W, H, W, H])
+                (centerX, centerY, width, height) = box.astype("int")
+
+                x = int(centerX - (width / 2))
+                y = int(centerY - (height / 2))
+
+                boxes.append([x, y, int(width), int(height)])
+                confidences.append(float(confidence))
+                class_ids.append(class_id)
+
+    return boxes, confidences, class_ids
+
+
+def synthetic_outputs(seed=0, num_classes=80, input_size=416, hit_rate=0.01):
+    """Build random output tensors shaped like the three YOLOv3 heads"""
+    rng = np.random.default_rng(seed)
+    outputs = []
+    for stride in (32, 16, 8):
+        cells = (input_size // stride) ** 2 * 3
+        output = np.zeros((cells, 5 + num_classes), dtype=np.float32)
+        output[:, 0:4] = rng.random((cells, 4), dtype=np.float32)
+        output[:, 4] = rng.random(cells, dtype=np.float32)
+        # Most rows are near-empty, a few carry a confident class score
+        output[:, 5:] = rng.random((cells, num_classes), dtype=np.float32) * 0.2
+        hits = rng.random(cells) < hit_rate
+        output[hits, 5 + rng.integers(0, num_classes, hits.sum())] = \
+            rng.uniform(0.3, 1.0, hits.sum()).astype(np.float32)
+        outputs.append(output)
+    return outputs
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from decode_reference import loop_decode, synthetic_outputs
+from detector import decode_outputs
+
+W, H = 1280, 720
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('threshold', [0.0, 0.3, 0.5, 0.9])
+def test_matches_reference_loop(seed, threshold):
+    outputs = synthetic_outputs(seed)
+    ref_boxes, ref_confs, ref_ids = loop_decode(outputs, W, H, threshold)
+    boxes, confs, ids = decode_outputs(outputs, W, H, threshold)
+
+    assert boxes.tolist() == ref_boxes
+    assert np.array_equal(confs, np.array(ref_confs, dtype=np.float32))
+    assert ids.tolist() == [int(i) for i in ref_ids]
+
+
+def test_single_head():
+    outputs = synthetic_outputs(seed=1)[:1]
+    ref_boxes, _, _ = loop_decode(outputs, W, H, 0.3)
+    boxes, _, _ = decode_outputs(outputs, W, H, 0.3)
+    assert boxes.tolist() == ref_boxes
+
+
+def test_nothing_above_threshold():
+    boxes, confs, ids = decode_outputs(synthetic_outputs(seed=2), W, H, 1.0)
+    assert boxes.shape == (0, 4)
+    assert len(confs) == 0 and len(ids) == 0
+
+
+def test_output_dtypes():
+    boxes, confs, ids = decode_outputs(synthetic_outputs(seed=3), W, H, 0.5)
+    assert boxes.dtype == np.int32
+    assert confs.dtype == np.float32
+    assert ids.dtype == np.int32
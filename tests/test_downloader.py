@@ -0,0 +1,142 @@
+import hashlib
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import download_file
+
+DATA = bytes(range(256)) * 1200
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """Serves DATA, honouring Range headers only if the server says so"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        requested = self.headers.get('Range')
+        server.ranges.append(requested)
+
+        start = 0
+        if requested and server.honour_range:
+            start = int(requested.split('=')[1].rstrip('-'))
+            if start >= len(DATA):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(DATA) - 1}/{len(DATA)}')
+        else:
+            self.send_response(200)
+        body = DATA[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if server.truncate:
+            # Drop the connection halfway through the body
+            server.truncate -= 1
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(params=[True, False], ids=['range', 'no-range'])
+def server(request):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+    httpd.daemon_threads = True
+    httpd.honour_range = request.param
+    httpd.ranges = []
+    httpd.truncate = 0
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/model.weights"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def sha256_of(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_fresh_download(server, tmp_path):
+    dest = str(tmp_path / 'model.weights')
+    download_file(server.url, dest, sha256=DIGEST, chunk_size=4096)
+    assert sha256_of(dest) == DIGEST
+    assert not os.path.exists(dest + '.part')
+    assert server.ranges == [None]
+
+
+def test_partial_download_resumes_or_restarts(server, tmp_path):
+    dest = str(tmp_path / 'model.weights')
+    with open(dest + '.part', 'wb') as f:
+        # A server that ignores Range must not leave these bytes in place
+        f.write(DATA[:1000] if server.honour_range else b'x' * 1000)
+
+    download_file(server.url, dest, sha256=DIGEST, chunk_size=4096)
+    assert sha256_of(dest) == DIGEST
+    assert server.ranges == ['bytes=1000-']
+
+
+def test_complete_part_file_is_kept_on_416(server, tmp_path):
+    if not server.honour_range:
+        pytest.skip("416 needs a server that honours Range")
+    dest = str(tmp_path / 'model.weights')
+    with open(dest + '.part', 'wb') as f:
+        f.write(DATA)
+
+    download_file(server.url, dest, sha256=DIGEST)
+    assert sha256_of(dest) == DIGEST
+    assert server.ranges == [f'bytes={len(DATA)}-']
+
+
+def test_dropped_connection_is_retried(server, tmp_path):
+    dest = str(tmp_path / 'model.weights')
+    server.truncate = 1
+    download_file(server.url, dest, sha256=DIGEST, chunk_size=4096)
+    assert sha256_of(dest) == DIGEST
+    assert len(server.ranges) == 2
+    assert server.ranges[1] is not None
+
+
+def test_checksum_mismatch_leaves_nothing(server, tmp_path):
+    dest = str(tmp_path / 'model.weights')
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        download_file(server.url, dest, sha256='0' * 64)
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + '.part')
+
+
+def test_concurrent_calls_share_one_download(server, tmp_path):
+    dest = str(tmp_path / 'model.weights')
+    errors = []
+
+    def download():
+        try:
+            download_file(server.url, dest, sha256=DIGEST, chunk_size=4096)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=download) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    # Later calls reuse the verified file without a request
+    download_file(server.url, dest, sha256=DIGEST)
+    assert sha256_of(dest) == DIGEST
+    assert server.ranges == [None]
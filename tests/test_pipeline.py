@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import DetectionPipeline, SyntheticFrameSource
+
+
+class SlowDetector:
+    """Stands in for ObjectDetector with inference slower than capture"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def read_frame(self, source):
+        ret, frame = source.read()
+        return frame if ret else None
+
+    def process_frame(self, frame):
+        time.sleep(self.seconds)
+        return frame, []
+
+
+def test_slow_inference_drops_frames_and_keeps_order():
+    source = SyntheticFrameSource(64, 48, fps=200)
+    pipeline = DetectionPipeline(SlowDetector(0.03), source)
+    pipeline.start()
+    try:
+        seqs = []
+        deadline = time.perf_counter() + 1.0
+        while time.perf_counter() < deadline:
+            latest = pipeline.get_latest()
+            if latest is not None:
+                seqs.append(latest[0])
+            time.sleep(0.005)
+    finally:
+        pipeline.stop()
+
+    assert pipeline.frames_dropped > 0
+    assert pipeline.frames_processed < pipeline.frames_captured
+    assert seqs and all(a <= b for a, b in zip(seqs, seqs[1:]))
+    assert seqs[-1] > seqs[0]
+    assert pipeline.error is None
+    assert not pipeline.capture_thread.is_alive()
+    assert not pipeline.inference_thread.is_alive()
+
+
+def test_stop_ends_an_endless_source():
+    pipeline = DetectionPipeline(SlowDetector(0.0), SyntheticFrameSource(64, 48))
+    pipeline.start()
+    time.sleep(0.1)
+    pipeline.stop()
+    assert not pipeline.capture_thread.is_alive()
+    assert not pipeline.inference_thread.is_alive()
+    assert not pipeline.running
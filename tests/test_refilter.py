@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector import ObjectDetector
+
+
+class UnloadedDetector(ObjectDetector):
+    """ObjectDetector that skips loading a network"""
+
+    def _prepare_model(self, download):
+        return self
+
+
+def make_detector():
+    return UnloadedDetector(config_path='unused.cfg', weights_path='unused.weights')
+
+
+def outputs_with_scores(scores, num_classes=80):
+    """One darknet output head with a separate box of class 0 per score"""
+    rows = np.zeros((len(scores), 5 + num_classes), dtype=np.float32)
+    for i, score in enumerate(scores):
+        rows[i, 0:4] = (0.1 + 0.3 * i, 0.5, 0.1, 0.1)
+        rows[i, 4] = 1.0
+        rows[i, 5] = score
+    return [rows]
+
+
+def test_refilter_matches_a_fresh_pass():
+    detector = make_detector()
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    outputs = outputs_with_scores([0.6, 0.3, 0.07])
+    detector._postprocess(outputs, 100, 100, frame=frame)
+
+    detector.set_confidence_threshold(0.25)
+    refiltered = detector.refilter()
+    fresh = detector._postprocess(outputs, 100, 100)
+    assert len(refiltered) == len(fresh) == 2
+    assert np.array_equal(refiltered.boxes, fresh.boxes)
+
+
+def test_refilter_below_candidate_floor_waits_for_detection():
+    detector = make_detector()
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    outputs = outputs_with_scores([0.6, 0.3, 0.07])
+    detector._postprocess(outputs, 100, 100, frame=frame)
+
+    # The 0.07 candidate was not cached, so a refilter would miss it
+    detector.set_confidence_threshold(0.05)
+    assert len(detector._postprocess(outputs, 100, 100)) == 3
+    assert detector.refilter() is None
+    assert detector.redraw() == (None, [])
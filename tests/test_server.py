@@ -0,0 +1,66 @@
+import http.client
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import DetectionServer
+
+
+@pytest.fixture
+def server():
+    # Requests rejected before decoding never reach the batcher
+    httpd = DetectionServer(('127.0.0.1', 0), batcher=None)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(server, headers, body=b''):
+    """
+    Send a raw POST /detect
+    Returns:
+        tuple: (status, payload, closed), closed being True if the server
+            hung up after the response
+    """
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    conn.putrequest('POST', '/detect', skip_accept_encoding=True)
+    for name, value in headers.items():
+        conn.putheader(name, value)
+    conn.endheaders(body)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    # A kept-alive connection has nothing more to read and times out
+    conn.sock.settimeout(0.5)
+    try:
+        closed = conn.sock.recv(1) == b''
+    except TimeoutError:
+        closed = False
+    conn.close()
+    return response.status, payload, closed
+
+
+@pytest.mark.parametrize('value', ['abc', '12x', '1e3'])
+def test_malformed_content_length_is_rejected(server, value):
+    status, payload, closed = post(server, {'Content-Length': value}, b'abc')
+    assert (status, payload) == (400, {'error': 'invalid Content-Length'})
+    assert closed
+
+
+def test_empty_body_keeps_connection(server):
+    status, payload, closed = post(server, {'Content-Length': '0'})
+    assert (status, payload) == (400, {'error': 'empty request body'})
+    assert not closed
+
+
+def test_oversized_body_is_rejected(server):
+    server.max_body = 10
+    status, payload, closed = post(server, {'Content-Length': '11'}, b'x' * 11)
+    assert status == 413
+    assert closed
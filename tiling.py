@@ -0,0 +1,83 @@
+import math
+
+
+def tile_starts(length, tile, count):
+    """
+    Evenly spaced offsets of count tiles covering [0, length), the first
+    and last tile flush with the edges
+    Args:
+        length: frame width or height
+        tile: tile width or height
+        count: number of tiles along this axis
+    """
+    if tile >= length:
+        return [0]
+    count = max(2, count)
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+
+class TileLayout:
+    def __init__(self, tile_size=832, grid=None, overlap=0.2, full_frame=True):
+        """
+        How a large frame is split into overlapping tiles
+        Args:
+            tile_size: tile side in frame pixels, int or (width, height);
+                ignored when grid is given
+            grid: (columns, rows) to split every frame into instead of a
+                fixed tile size
+            overlap: fraction of a tile shared with its neighbour, so
+                objects on a seam are whole in at least one tile
+            full_frame: also run the whole (downscaled) frame as one more
+                tile so large objects are not cut up
+        """
+        if not 0 <= overlap < 1:
+            raise ValueError(f"Overlap must be in [0, 1), got {overlap}")
+        if isinstance(tile_size, int):
+            tile_size = (tile_size, tile_size)
+        self.tile_size = tile_size
+        self.grid = grid
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self._cache = {}
+
+    def applies(self, frame):
+        """True if the frame is large enough to be split into several tiles"""
+        (H, W) = frame.shape[:2]
+        return len(self.tiles(W, H)) > 1
+
+    def tiles(self, W, H):
+        """
+        Tile rectangles for a W x H frame
+        Returns:
+            list: (x, y, w, h) tuples, the full frame last if full_frame is set
+        """
+        key = (W, H)
+        tiles = self._cache.get(key)
+        if tiles is None:
+            tiles = self._cache[key] = self._layout(W, H)
+        return tiles
+
+    def _layout(self, W, H):
+        if self.grid is not None:
+            (columns, rows) = self.grid
+            # Tiles of this size with the requested overlap exactly fill the frame
+            tile_w = min(W, math.ceil(W / (columns - (columns - 1) * self.overlap)))
+            tile_h = min(H, math.ceil(H / (rows - (rows - 1) * self.overlap)))
+        else:
+            (tile_w, tile_h) = (min(W, self.tile_size[0]), min(H, self.tile_size[1]))
+            columns = self._count(W, tile_w)
+            rows = self._count(H, tile_h)
+
+        xs = tile_starts(W, tile_w, columns)
+        ys = tile_starts(H, tile_h, rows)
+        tiles = [(x, y, tile_w, tile_h) for y in ys for x in xs]
+        if len(tiles) > 1 and self.full_frame:
+            tiles.append((0, 0, W, H))
+        return tiles
+
+    def _count(self, length, tile):
+        """Fewest tiles of size tile covering length with at least the requested overlap"""
+        if tile >= length:
+            return 1
+        step = tile * (1 - self.overlap)
+        return math.ceil((length - tile) / step) + 1
@@ -0,0 +1,219 @@
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """
+    Pairwise intersection-over-union of corner-form boxes
+    Args:
+        a: (N, 4) array of [x1, y1, x2, y2]
+        b: (M, 4) array of [x1, y1, x2, y2]
+    Returns:
+        numpy.ndarray: (N, M) IoU values
+    """
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def greedy_match(score, threshold, higher_is_better=True):
+    """
+    Greedily pair rows and columns of a score matrix, best pairs first
+    Returns:
+        list: (row, col) pairs whose score passes threshold
+    """
+    if score.size == 0:
+        return []
+    order = np.argsort(-score if higher_is_better else score, axis=None)
+    rows, cols = np.unravel_index(order, score.shape)
+    used_rows, used_cols, pairs = set(), set(), []
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        value = score[r, c]
+        if (value < threshold) if higher_is_better else (value > threshold):
+            break
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((r, c))
+    return pairs
+
+
+class Tracker:
+    def __init__(self, iou_threshold=0.3, centroid_threshold=1.0, max_missed=10,
+                 confidence_decay=0.9, velocity_smoothing=0.5):
+        """
+        Carry detections across frames with stable track ids
+        Args:
+            iou_threshold: minimum IoU to associate a detection with a track
+            centroid_threshold: fallback association when centers are closer
+                than this fraction of the track's box diagonal
+            max_missed: drop a track after this many detections without a match
+            confidence_decay: score multiplier per predicted (undetected) frame
+            velocity_smoothing: weight of the newest velocity measurement
+        """
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_missed = max_missed
+        self.confidence_decay = confidence_decay
+        self.velocity_smoothing = velocity_smoothing
+        self.reset()
+
+    def reset(self):
+        """Forget all tracks"""
+        self.next_id = 1
+        self.ids = np.empty(0, dtype=np.int32)
+        self.boxes = np.empty((0, 4), dtype=np.float64)
+        self.velocities = np.empty((0, 2), dtype=np.float64)
+        self.scores = np.empty(0, dtype=np.float32)
+        self.class_ids = np.empty(0, dtype=np.int32)
+        self.missed = np.empty(0, dtype=np.int32)
+        self.frames_since_update = 0
+        self.match_quality = 1.0
+        self.classes = []
+
+    @property
+    def confidence(self):
+        """
+        How well the tracks followed the scene up to the last detection:
+        mean IoU between the predicted boxes and the detections they were
+        matched to, with unmatched tracks and detections counting as 0
+        """
+        return self.match_quality
+
+    def update(self, detections):
+        """
+        Associate fresh detections with the existing tracks
+        Args:
+            detections: Detections from ObjectDetector.detect()
+        Returns:
+            Detections: the input detections with track_ids filled in
+        """
+        from detector import Detections
+
+        self.classes = detections.classes
+        boxes = detections.boxes.astype(np.float64)
+        elapsed = max(self.frames_since_update, 0) + 1
+        pairs = self._associate(boxes, detections.class_ids)
+        self.match_quality = self._match_quality(boxes, pairs)
+
+        track_for_det = np.full(len(boxes), -1)
+        matched_tracks = np.zeros(len(self.ids), dtype=bool)
+        for t, d in pairs:
+            track_for_det[d] = t
+            matched_tracks[t] = True
+
+        # Update matched tracks with a smoothed constant-velocity estimate
+        if pairs:
+            t_idx = np.array([t for t, _ in pairs])
+            d_idx = np.array([d for _, d in pairs])
+            old_centers = self._centers(self.boxes[t_idx]) - self.velocities[t_idx] * (elapsed - 1)
+            new_centers = self._centers(boxes[d_idx])
+            measured = (new_centers - old_centers) / elapsed
+            alpha = self.velocity_smoothing
+            self.velocities[t_idx] = alpha * measured + (1 - alpha) * self.velocities[t_idx]
+            self.boxes[t_idx] = boxes[d_idx]
+            self.scores[t_idx] = detections.scores[d_idx]
+            self.class_ids[t_idx] = detections.class_ids[d_idx]
+            self.missed[t_idx] = 0
+
+        # Age out tracks that were not seen
+        self.missed[~matched_tracks] += 1
+        keep = self.missed <= self.max_missed
+        matched = track_for_det >= 0
+        track_for_det[matched] = (np.cumsum(keep) - 1)[track_for_det[matched]]
+        self._select(keep)
+
+        # Start tracks for unmatched detections
+        new = np.flatnonzero(track_for_det < 0)
+        if len(new):
+            new_ids = np.arange(self.next_id, self.next_id + len(new), dtype=np.int32)
+            self.next_id += len(new)
+            track_for_det[new] = np.arange(len(self.ids), len(self.ids) + len(new))
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, boxes[new]])
+            self.velocities = np.concatenate([self.velocities, np.zeros((len(new), 2))])
+            self.scores = np.concatenate([self.scores, detections.scores[new]])
+            self.class_ids = np.concatenate([self.class_ids, detections.class_ids[new]])
+            self.missed = np.concatenate([self.missed, np.zeros(len(new), dtype=np.int32)])
+
+        self.frames_since_update = 0
+        return Detections(detections.boxes, detections.scores, detections.class_ids,
+                          detections.classes, self.ids[track_for_det])
+
+    def predict(self):
+        """
+        Advance every live track by one frame without a detection
+        Returns:
+            Detections: predicted boxes with decayed scores and track ids
+        """
+        from detector import Detections
+
+        self.frames_since_update += 1
+        self.boxes[:, 0:2] += self.velocities
+        self.boxes[:, 2:4] += self.velocities
+        self.scores = (self.scores * self.confidence_decay).astype(np.float32)
+
+        visible = self.missed == 0
+        return Detections(np.rint(self.boxes[visible]).astype(np.int32),
+                          self.scores[visible], self.class_ids[visible],
+                          self.classes, self.ids[visible])
+
+    def _associate(self, boxes, class_ids):
+        """Match detections to tracks by IoU, then by centroid distance"""
+        if len(self.ids) == 0 or len(boxes) == 0:
+            return []
+
+        same_class = self.class_ids[:, None] == class_ids[None, :]
+        iou = np.where(same_class, iou_matrix(self.boxes, boxes), 0.0)
+        pairs = greedy_match(iou, max(self.iou_threshold, 1e-9))
+
+        # Fall back to normalized centroid distance for what IoU left over
+        used_t = {t for t, _ in pairs}
+        used_d = {d for _, d in pairs}
+        free_t = np.array([t for t in range(len(self.ids)) if t not in used_t], dtype=int)
+        free_d = np.array([d for d in range(len(boxes)) if d not in used_d], dtype=int)
+        if len(free_t) and len(free_d):
+            track_boxes = self.boxes[free_t]
+            diag = np.hypot(track_boxes[:, 2] - track_boxes[:, 0],
+                            track_boxes[:, 3] - track_boxes[:, 1])
+            dist = np.linalg.norm(self._centers(track_boxes)[:, None, :] -
+                                  self._centers(boxes[free_d])[None, :, :], axis=2)
+            dist = dist / np.maximum(diag, 1.0)[:, None]
+            dist[~same_class[np.ix_(free_t, free_d)]] = np.inf
+            for t, d in greedy_match(dist, self.centroid_threshold, higher_is_better=False):
+                pairs.append((int(free_t[t]), int(free_d[d])))
+        return pairs
+
+    def _match_quality(self, boxes, pairs):
+        """Score how well the predicted tracks matched fresh detections, see confidence"""
+        visible = int(np.count_nonzero(self.missed == 0))
+        if visible == 0:
+            # Nothing was predicted, so nothing can have drifted
+            return 1.0
+        if not pairs:
+            return 0.0
+        t_idx = np.array([t for t, _ in pairs])
+        d_idx = np.array([d for _, d in pairs])
+        ious = iou_matrix(self.boxes[t_idx], boxes[d_idx]).diagonal()
+        return float(ious.sum() / max(visible, len(boxes)))
+
+    def _select(self, keep):
+        """Keep only the tracks selected by a boolean mask"""
+        self.ids = self.ids[keep]
+        self.boxes = self.boxes[keep]
+        self.velocities = self.velocities[keep]
+        self.scores = self.scores[keep]
+        self.class_ids = self.class_ids[keep]
+        self.missed = self.missed[keep]
+
+    @staticmethod
+    def _centers(boxes):
+        return (boxes[:, 0:2] + boxes[:, 2:4]) / 2
@@ -1,8 +1,181 @@
 import customtkinter as ctk
-from PIL import Image
+from PIL import Image, ImageTk
 import numpy as np
+import cv2
+import math
+import time
+import warnings
 from customtkinter import CTkImage
 
+
+def to_ctk_image(frame):
+    """Convert a BGR frame into a CTkImage for display"""
+    # Convert frame to RGB for tkinter
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    
+    # Convert to PIL Image and then to CTkImage
+    pil_image = Image.fromarray(frame_rgb)
+    return ctk.CTkImage(light_image=pil_image, 
+                        dark_image=pil_image,
+                        size=pil_image.size)
+
+
+class DetectionRow:
+    """One reusable row of the sidebar detection list"""
+    __slots__ = ('frame', 'class_label', 'conf_label', 'class_text', 'conf_text')
+    
+    def __init__(self, parent):
+        self.frame = ctk.CTkFrame(parent)
+        
+        self.class_label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=("Arial", 13, "bold")
+        )
+        self.class_label.pack(side="left", padx=5, pady=2)
+        
+        self.conf_label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=("Arial", 12),
+            text_color="gray70"
+        )
+        self.conf_label.pack(side="right", padx=5, pady=2)
+        
+        self.class_text = ""
+        self.conf_text = ""
+        
+    def show(self, class_text, conf_text):
+        """Update the labels, touching only the ones whose text changed"""
+        if class_text != self.class_text:
+            self.class_label.configure(text=class_text)
+            self.class_text = class_text
+        if conf_text != self.conf_text:
+            self.conf_label.configure(text=conf_text)
+            self.conf_text = conf_text
+
+
+class VideoView:
+    """Label that shows video frames through one persistent PhotoImage"""
+    
+    def __init__(self, container, label):
+        """
+        Args:
+            container: widget whose size the frames are scaled to fit
+            label: CTkLabel inside container that displays the frames
+        """
+        self.container = container
+        self.label = label
+        self.current_image = None
+        
+        # Persistent render target, rebuilt only when the display size changes
+        self.render_size = None
+        self.resize_buffer = None
+        self.rgba_buffer = None
+        self.render_image = None
+        self.photo = None
+        self.photo_attached = False
+        
+    def render(self, frame):
+        """
+        Show a BGR frame scaled to fit the container.
+        The frame is resized and converted in OpenCV into preallocated
+        buffers and pasted into a single PhotoImage that is updated in
+        place. PhotoImage.paste() still allocates and fills one
+        display-sized block buffer per frame, because Image.frombuffer()
+        images are not block-allocated.
+        """
+        (H, W) = frame.shape[:2]
+        
+        # Fit into the space the container gives the label
+        box_w = self.container.winfo_width() - 4
+        box_h = self.container.winfo_height() - 4
+        if box_w < 2 or box_h < 2:
+            box_w, box_h = W, H
+        scale = min(box_w / W, box_h / H)
+        size = (max(1, int(W * scale)), max(1, int(H * scale)))
+        
+        if size != self.render_size:
+            self._allocate_render_target(size)
+            
+        if size == (W, H):
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=self.rgba_buffer)
+        else:
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            cv2.resize(frame, size, dst=self.resize_buffer, interpolation=interpolation)
+            cv2.cvtColor(self.resize_buffer, cv2.COLOR_BGR2RGBA, dst=self.rgba_buffer)
+            
+        # render_image shares memory with rgba_buffer, but paste() copies it
+        # into a freshly allocated block buffer before handing it to Tk
+        self.photo.paste(self.render_image)
+        
+        if not self.photo_attached:
+            with warnings.catch_warnings():
+                # The frame is already rendered at device pixels, so
+                # CTkImage's HighDPI scaling is not needed
+                warnings.simplefilter("ignore")
+                self.label.configure(image=self.photo, text="")
+            self.current_image = self.photo
+            self.photo_attached = True
+            
+    def show_image(self, image):
+        """Show a ready-made CTkImage instead of a rendered frame"""
+        self.current_image = image
+        self.photo_attached = False
+        self.label.configure(image=image, text="")
+        
+    def _allocate_render_target(self, size):
+        """Create the buffers and PhotoImage for a display size"""
+        (w, h) = size
+        self.render_size = size
+        self.resize_buffer = np.empty((h, w, 3), dtype=np.uint8)
+        self.rgba_buffer = np.empty((h, w, 4), dtype=np.uint8)
+        self.render_image = Image.frombuffer("RGBA", size, self.rgba_buffer,
+                                             "raw", "RGBA", 0, 1)
+        self.photo = ImageTk.PhotoImage("RGBA", size)
+        self.photo_attached = False
+        
+    def clear(self, text):
+        """Remove the image and show a text instead"""
+        self.label.configure(text=text, image="")
+        self.current_image = None
+        self.photo_attached = False
+
+
+class StreamTile:
+    """One cell of the multi-stream grid: a title line and a video view"""
+    
+    def __init__(self, parent, name):
+        self.frame = ctk.CTkFrame(parent)
+        
+        self.title_label = ctk.CTkLabel(
+            self.frame,
+            text=name,
+            font=("Arial", 12, "bold")
+        )
+        self.title_label.pack(fill="x", padx=5)
+        self.title_text = name
+        
+        # Fixed-size holder so the image cannot grow the tile
+        self.holder = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.holder.pack(fill="both", expand=True)
+        self.holder.pack_propagate(False)
+        
+        self.video_label = ctk.CTkLabel(
+            self.holder,
+            text="Waiting for frames...",
+            font=("Arial", 12)
+        )
+        self.video_label.pack(fill="both", expand=True)
+        self.video = VideoView(self.holder, self.video_label)
+        
+    def show_title(self, text):
+        """Update the title, only touching the label when the text changed"""
+        if text != self.title_text:
+            self.title_label.configure(text=text)
+            self.title_text = text
+
+
 class ApplicationUI:
     def __init__(self):
         """Initialize the main application window"""
@@ -101,6 +274,16 @@ class ApplicationUI:
         )
         self.total_detections_label.pack(pady=5)
         
+        # Performance stats, filled in by update_stats()
+        self.perf_label = ctk.CTkLabel(
+            self.stats_frame,
+            text="",
+            font=("Courier", 11),
+            justify="left",
+            text_color="gray70"
+        )
+        self.perf_label.pack(pady=(0, 5))
+        
         # Create scrollable frame for detections
         self.detections_frame = ctk.CTkScrollableFrame(
             self.right_panel,
@@ -109,11 +292,33 @@ class ApplicationUI:
         )
         self.detections_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
+        # Pooled detection rows, reused across updates
+        self.detection_rows = []
+        self.visible_rows = 0
+        self.max_detection_rows = 50
+        self.more_label = ctk.CTkLabel(
+            self.detections_frame,
+            text="",
+            font=("Arial", 12),
+            text_color="gray70"
+        )
+        self.more_visible = False
+        self.total_text = "Total Detections: 0"
+        
+        # The list refreshes at most every detections_interval seconds,
+        # independently of the video refresh rate
+        self.detections_interval = 0.2
+        self.last_detections_update = 0.0
+        self.pending_detections = None
+        self.detections_job = None
+        
         # Bind confidence slider update
         self.conf_slider.configure(command=self._update_conf_label)
         
-        # Store current image reference
-        self.current_image = None
+        # Single video view and, for several streams, the grid replacing it
+        self.video = VideoView(self.video_frame, self.video_label)
+        self.stream_grid = None
+        self.stream_tiles = {}
         
     def _update_conf_label(self, value):
         """Update confidence threshold label"""
@@ -136,6 +341,34 @@ class ApplicationUI:
                 hover_color=["#325882", "#14375e"]
             )
             
+    def set_busy(self, text):
+        """Disable the control button while work runs in the background"""
+        self.control_button.configure(state="disabled", text=text)
+        if not self.running:
+            self.video_label.configure(text=text)
+            
+    def set_idle(self):
+        """Show the stopped state with the start button enabled"""
+        self.running = False
+        self.control_button.configure(
+            state="normal",
+            text="Start Detection",
+            fg_color=["#3a7ebf", "#1f538d"],
+            hover_color=["#325882", "#14375e"]
+        )
+        self.hide_streams()
+        self.clear_video()
+        
+    def set_running(self):
+        """Show the running state with the stop button enabled"""
+        self.running = True
+        self.control_button.configure(
+            state="normal",
+            text="Stop Detection",
+            fg_color="#c42b1c",
+            hover_color="#a62215"
+        )
+        
     def update_frame(self, ctk_image):
         """Update the video frame with new image"""
         if ctk_image is not None:
@@ -146,40 +379,158 @@ class ApplicationUI:
                     print(f"Invalid image type: {type(ctk_image)}")  
                     return 
 
-            self.current_image = ctk_image
-            self.video_label.configure(image=self.current_image, text="")
+            self.video.show_image(ctk_image)
         else:
-            self.video_label.configure(text="Camera Feed Not Started", image=None)
-
+            self.clear_video()
+            
+    def render_frame(self, frame):
+        """Show a BGR frame in the video label, scaled to fit the label"""
+        self.video.render(frame)
+        
+    def clear_video(self):
+        """Remove the video image and show the idle text"""
+        self.video.clear("Camera Feed Not Started")
+        
+    def show_streams(self, names, columns=None):
+        """
+        Replace the single video view with a grid of stream tiles
+        Args:
+            names: stream names, one tile each
+            columns: tiles per row, a near-square grid by default
+        """
+        self.hide_streams()
+        columns = columns or math.ceil(math.sqrt(len(names)))
+        rows = math.ceil(len(names) / columns)
+        
+        self.video_label.pack_forget()
+        self.stream_grid = ctk.CTkFrame(self.video_frame, fg_color="transparent")
+        self.stream_grid.pack(fill="both", expand=True)
+        for column in range(columns):
+            self.stream_grid.grid_columnconfigure(column, weight=1, uniform="tile")
+        for row in range(rows):
+            self.stream_grid.grid_rowconfigure(row, weight=1, uniform="tile")
+            
+        for index, name in enumerate(names):
+            tile = StreamTile(self.stream_grid, name)
+            tile.frame.grid(row=index // columns, column=index % columns,
+                            sticky="nsew", padx=2, pady=2)
+            self.stream_tiles[name] = tile
+            
+    def hide_streams(self):
+        """Remove the stream grid and go back to the single video view"""
+        if self.stream_grid is None:
+            return
+        self.stream_grid.destroy()
+        self.stream_grid = None
+        self.stream_tiles = {}
+        self.video_label.pack(fill="both", expand=True)
+        
+    def render_stream(self, name, frame):
+        """Show a BGR frame in a stream's tile"""
+        self.stream_tiles[name].video.render(frame)
+        
+    def update_stream_stats(self, stats):
+        """
+        Show per-stream FPS and drop counts in the tile titles
+        Args:
+            stats: dict returned by StreamManager.stats()
+        """
+        for name, info in stats.items():
+            tile = self.stream_tiles.get(name)
+            if tile is None:
+                continue
+            if info['error'] is not None:
+                state = "  (error)"
+            elif info['finished']:
+                state = "  (ended)"
+            else:
+                state = ""
+            tile.show_title(f"{name}  {info['fps']:.1f} fps  dropped {info['dropped']}{state}")
             
     def update_detections(self, detections):
-        """Update the detections list in the sidebar"""
-        self.total_detections_label.configure(text=f"Total Detections: {len(detections)}")
-        
-        for widget in self.detections_frame.winfo_children():
-            widget.destroy()
-            
-        # Add new detections
-        for i, det in enumerate(detections):
-            det_frame = ctk.CTkFrame(self.detections_frame)
-            det_frame.pack(fill="x", pady=2, padx=5)
-            
-            # Add detection info
-            class_label = ctk.CTkLabel(
-                det_frame,
-                text=f"{det['class']}",
-                font=("Arial", 13, "bold")
-            )
-            class_label.pack(side="left", padx=5, pady=2)
+        """
+        Update the detections list in the sidebar. Calls arriving faster than
+        detections_interval are coalesced and only the newest list is shown.
+        """
+        self.pending_detections = detections
+        if self.detections_job is not None:
+            return
             
-            conf_label = ctk.CTkLabel(
-                det_frame,
-                text=f"Conf: {det['confidence']:.2f}",
-                font=("Arial", 12),
-                text_color="gray70"
-            )
-            conf_label.pack(side="right", padx=5, pady=2)
+        wait = self.last_detections_update + self.detections_interval - time.perf_counter()
+        if wait <= 0:
+            self._apply_detections()
+        else:
+            self.detections_job = self.window.after(int(wait * 1000) + 1,
+                                                    self._apply_detections)
+            
+    def _apply_detections(self):
+        """Show the pending detections using the pooled rows"""
+        self.detections_job = None
+        detections = self.pending_detections
+        self.pending_detections = None
+        if detections is None:
+            return
+        self.last_detections_update = time.perf_counter()
+        
+        total_text = f"Total Detections: {len(detections)}"
+        if total_text != self.total_text:
+            self.total_detections_label.configure(text=total_text)
+            self.total_text = total_text
+            
+        shown = detections[:self.max_detection_rows]
+        
+        # Grow the pool only when more rows are needed than ever before
+        while len(self.detection_rows) < len(shown):
+            self.detection_rows.append(DetectionRow(self.detections_frame))
             
+        for row, det in zip(self.detection_rows, shown):
+            class_text = f"#{det['track_id']} {det['class']}" if 'track_id' in det else f"{det['class']}"
+            row.show(class_text, f"Conf: {det['confidence']:.2f}")
+            
+        # Show or hide rows at the end of the list, keeping their order
+        for row in self.detection_rows[self.visible_rows:len(shown)]:
+            row.frame.pack(fill="x", pady=2, padx=5)
+        for row in self.detection_rows[len(shown):self.visible_rows]:
+            row.frame.pack_forget()
+        self.visible_rows = len(shown)
+        
+        # The overflow label is only shown when every row is, so it stays last
+        more = len(detections) - len(shown)
+        if more > 0:
+            self.more_label.configure(text=f"+{more} more")
+            if not self.more_visible:
+                self.more_label.pack(pady=2)
+                self.more_visible = True
+        elif self.more_visible:
+            self.more_label.pack_forget()
+            self.more_visible = False
+            
+    def update_stats(self, snapshot, operating_point=None):
+        """
+        Show FPS and per-stage latency from a Metrics snapshot
+        Args:
+            snapshot: dict returned by Metrics.snapshot()
+            operating_point: dict from ObjectDetector.operating_point, shown
+                above the timings when the quality controller is on
+        """
+        lines = [f"{name:<13} {rate:6.1f} fps" for name, rate in snapshot['fps'].items()]
+        for name, stats in snapshot['stages'].items():
+            lines.append(f"{name:<13} {stats['p50_ms']:6.1f} / {stats['p95_ms']:6.1f} ms")
+        if len(lines) > len(snapshot['fps']):
+            lines.insert(len(snapshot['fps']), f"{'stage':<13} {'p50':>6} / {'p95':>6}")
+        if operating_point is not None:
+            point = operating_point
+            latency = point['latency_ms']
+            latency = "-" if latency is None else f"{latency:.1f}"
+            cap = point['max_candidates'] or "all"
+            lines[:0] = [
+                f"{'quality':<13} {point['level'] + 1}/{point['levels']}",
+                f"{'input':<13} {point['input_size']}px, every {point['detect_interval']}",
+                f"{'candidates':<13} {cap}",
+                f"{'latency':<13} {latency} / {point['budget_ms']:.1f} ms",
+            ]
+        self.perf_label.configure(text="\n".join(lines))
+        
     def get_confidence_threshold(self):
         """Get current confidence threshold value"""
         return self.conf_slider.get()
@@ -190,5 +541,8 @@ class ApplicationUI:
         
     def on_closing(self):
         """Handle application closing"""
+        if self.detections_job is not None:
+            self.window.after_cancel(self.detections_job)
+            self.detections_job = None
         self.window.quit()
         self.window.destroy()